@@ -0,0 +1,273 @@
+"""
+benchmark the cache-generation pipeline stage by stage
+every stage runs `--repeats` times over the raw/ workbooks (optionally scaled
+up by replicating batches `--scale` times) and reports median/p95 wall time
+the peak traced memory of one extra run and the process peak RSS.
+
+    python benchmark.py -o bench.json                 # save results
+    python benchmark.py --compare bench.json          # compare with a baseline
+    python benchmark.py --scale 10 --time-tables DIR  # bigger inputs
+"""
+
+import argparse
+import copy
+import datetime
+import json
+import math
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import generate_cache
+from generate_icalendar import (generate_icalendar_for_batch,
+                                serialize_icalendar_for_batch)
+from generate_v2 import encode_classes_v2
+
+STAMP = datetime.datetime(2026, 1, 5, 9, 0, 0)
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def measure(fn: Callable[[], object], repeats: int) -> Dict[str, float]:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "runs": repeats,
+        "median": statistics.median(times),
+        "p95": percentile(times, 95),
+        "min": min(times),
+        "peak_kb": peak // 1024,
+    }
+
+
+def scaled_batch(batch: str, i: int) -> str:
+    if i == 0:
+        return batch
+    prefix, number = generate_cache.split_on_number(batch)
+    return f"{prefix}{number + 1000 * i}"
+
+
+def scale_phase(evs: list, batches: List[str], factor: int) -> tuple[list, List[str]]:
+    """Replicate every event for `factor` copies of the batches"""
+    if factor <= 1:
+        return evs, batches
+
+    scaled_evs = []
+    for i in range(factor):
+        for ev in evs:
+            if ev is None:
+                continue
+            ev = copy.copy(ev)
+            ev.batches = [scaled_batch(b, i) for b in ev.batches]
+            scaled_evs.append(ev)
+
+    scaled = [scaled_batch(b, i) for i in range(factor) for b in batches]
+    return scaled_evs, sorted(scaled, key=generate_cache.batch_sort_key)
+
+
+def load_phases() -> Dict[str, tuple]:
+    generate_cache.get_curriculum_map()
+    branches, semesters, phases, excels = generate_cache.maps()
+    loaded = {}
+    faculty_json = ""
+    for course_id in branches:
+        faculty_json = generate_cache.faculty_json_for(course_id, faculty_json)
+        for sem in semesters[course_id]:
+            for phase in phases[course_id][sem]:
+                key = f"{course_id}_sem{sem}_phase{phase}"
+                loaded[key] = (excels.get(key), faculty_json)
+
+    return loaded
+
+
+def build_classes(parsed: Dict[str, tuple]) -> dict:
+    classes = {"electives": {}}
+    for key, (evs, batches, electives) in parsed.items():
+        classes["electives"][key] = electives
+        buckets = generate_cache.bucket_events(evs, electives)
+        for batch in batches:
+            classes[f"{key}_{batch.lower()}"] = {
+                "cacheVersion": "bench",
+                "classes": {
+                    day: list(buckets.get((batch, day.lower()), ()))
+                    for day in generate_cache.DAYS
+                },
+            }
+
+    return classes
+
+
+def run(repeats: int, scale: int, use_sheet_cache: bool) -> dict:
+    results: Dict[str, dict] = {}
+
+    def stage(name: str, fn: Callable[[], object], items: int):
+        results[name] = {
+            **measure(fn, repeats),
+            # process high-water mark once the stage has run
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "items": items,
+        }
+        print(
+            f"{name:<38}{results[name]['median'] * 1000:>10.2f} ms"
+            f"{results[name]['p95'] * 1000:>10.2f} ms p95"
+            f"{results[name]['peak_kb']:>10} KiB"
+        )
+
+    stage("maps", generate_cache.maps, 1)
+
+    inputs = load_phases()
+    parsed = {}
+    for key, (path, faculty_json) in inputs.items():
+        def events_stage():
+            return generate_cache.get_events(path, faculty_json, key, use_sheet_cache)
+
+        evs, batches = events_stage()
+        stage(f"get_events[{key}]", events_stage, len(evs))
+        parsed[key] = scale_phase(evs, batches, scale)
+
+    total_events = sum(len(evs) for evs, _ in parsed.values())
+
+    def electives_stage():
+        return {
+            key: generate_cache.get_electives(evs, batches)
+            for key, (evs, batches) in parsed.items()
+        }
+
+    stage("get_electives", electives_stage, total_events)
+    electives = electives_stage()
+    phases = {
+        key: (evs, batches, electives[key]) for key, (evs, batches) in parsed.items()
+    }
+
+    def filter_stage():
+        for evs, batches, phase_electives in phases.values():
+            for batch in batches:
+                for day in generate_cache.DAYS:
+                    generate_cache.filter_events(evs, batch, day)
+                    generate_cache.filter_electives(phase_electives, batch, day)
+
+    def bucket_stage():
+        for evs, _, phase_electives in phases.values():
+            generate_cache.bucket_events(evs, phase_electives)
+
+    stage("filter_events (legacy)", filter_stage, total_events)
+    stage("bucket_events", bucket_stage, total_events)
+
+    classes = build_classes(phases)
+    batch_items = [(k, v) for k, v in classes.items() if k != "electives"]
+
+    def ics_stage(serialize: Callable):
+        def fn():
+            for key, events_data in batch_items:
+                serialize(events_data, *key.split("_")[:4], STAMP)
+
+        return fn
+
+    stage(
+        "ics[icalendar]",
+        ics_stage(lambda *a: generate_icalendar_for_batch(*a).to_ical()),
+        len(batch_items),
+    )
+    stage("ics[fast]", ics_stage(serialize_icalendar_for_batch), len(batch_items))
+    stage("json.dumps classes", lambda: json.dumps(classes), len(batch_items))
+    stage(
+        "json.dumps v2",
+        lambda: json.dumps(encode_classes_v2(classes)),
+        len(batch_items),
+    )
+
+    return {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeats": repeats,
+            "scale": scale,
+            "sheet_cache": use_sheet_cache,
+        },
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "stages": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """Print median changes against baseline, False if a stage regressed
+    by more than threshold (fraction)"""
+    ok = True
+    print(f"\n{'stage':<38}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, stats in current["stages"].items():
+        base = baseline["stages"].get(name)
+        if base is None:
+            print(f"{name:<38}{'-':>12}{stats['median'] * 1000:>9.2f} ms{'new':>9}")
+            continue
+
+        change = stats["median"] / base["median"] - 1 if base["median"] else 0.0
+        flag = ""
+        if change > threshold:
+            ok = False
+            flag = "  REGRESSION"
+        print(
+            f"{name:<38}{base['median'] * 1000:>9.2f} ms"
+            f"{stats['median'] * 1000:>9.2f} ms{change:>+9.1%}{flag}"
+        )
+
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="benchmark the cache-generation pipeline"
+    )
+    parser.add_argument(
+        "-r", "--repeats", type=int, default=5, help="timed runs per stage"
+    )
+    parser.add_argument(
+        "-s", "--scale", type=int, default=1, help="replicate batches N times"
+    )
+    parser.add_argument(
+        "--time-tables", default=generate_cache.TIME_TABLE, help="raw timetable tree"
+    )
+    parser.add_argument(
+        "--sheet-cache",
+        action="store_true",
+        help="time get_events on the cell-grid cache instead of openpyxl",
+    )
+    parser.add_argument("-o", "--output", help="write results as json")
+    parser.add_argument("--compare", help="baseline results json to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed median slowdown per stage before --compare fails (fraction)",
+    )
+    args = parser.parse_args()
+
+    generate_cache.TIME_TABLE = args.time_tables
+    results = run(args.repeats, args.scale, args.sheet_cache)
+    print(f"max rss {results['max_rss_kb']} KiB")
+
+    if args.output:
+        with open(args.output, "w+") as f:
+            json.dump(results, f, indent=1)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
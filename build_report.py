@@ -0,0 +1,120 @@
+"""
+per-stage instrumentation of generate_cache runs
+every stage (faculty maps, maps, get_events / get_electives / bucketing per
+workbook, json dumps, icalenders, ...) records its wall time, cpu time,
+process peak RSS, item count and, with trace_memory, the tracemalloc peak.
+the run is written to ./build_report.json (not published), print_summary()
+gives the human readable version.
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import platform
+import resource
+import time
+import tracemalloc
+from typing import Dict, Iterator, List
+
+REPORT_FILE = "build_report.json"
+
+
+class BuildReport:
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.started = datetime.datetime.now().isoformat(timespec="seconds")
+        self.stages: List[dict] = []
+        self.info: Dict[str, object] = {}
+        # peaks of the enclosing stages, tracemalloc has a single peak counter
+        self._peaks: List[int] = []
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, workbook: str | None = None) -> Iterator[dict]:
+        """Time the block, the yielded entry takes extra fields (e.g. items)"""
+        entry: Dict[str, object] = {"stage": name}
+        if workbook is not None:
+            entry["workbook"] = workbook
+
+        if self.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield entry
+        finally:
+            entry["wall_s"] = round(time.perf_counter() - wall, 6)
+            entry["cpu_s"] = round(time.process_time() - cpu, 6)
+            entry["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if self.trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak = max(self._peaks.pop(), peak)
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                entry["peak_kb"] = peak // 1024
+            entry.setdefault("pid", os.getpid())
+            self.stages.append(entry)
+
+    def extend(self, entries: List[dict]) -> None:
+        """Add entries recorded by another (worker) report"""
+        self.stages.extend(entries)
+
+    def totals(self) -> Dict[str, dict]:
+        totals: Dict[str, dict] = {}
+        for entry in self.stages:
+            total = totals.setdefault(
+                entry["stage"],
+                {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "items": 0, "slowest": None},
+            )
+            total["count"] += 1
+            total["wall_s"] += entry["wall_s"]
+            total["cpu_s"] += entry["cpu_s"]
+            total["items"] += entry.get("items", 0)
+            if "peak_kb" in entry:
+                total["peak_kb"] = max(total.get("peak_kb", 0), entry["peak_kb"])
+            slowest = total["slowest"]
+            if "workbook" in entry and (
+                slowest is None or entry["wall_s"] > slowest["wall_s"]
+            ):
+                total["slowest"] = {
+                    "workbook": entry["workbook"],
+                    "wall_s": entry["wall_s"],
+                }
+
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            "started": self.started,
+            "python": platform.python_version(),
+            "trace_memory": self.trace_memory,
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            **self.info,
+            "totals": self.totals(),
+            "stages": self.stages,
+        }
+
+    def write(self, path: str = REPORT_FILE) -> None:
+        with open(path, "w+") as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    def print_summary(self) -> None:
+        print(f"{'stage':<20}{'runs':>6}{'wall':>11}{'cpu':>11}{'items':>9}{'peak':>11}")
+        for name, total in self.totals().items():
+            peak = f"{total['peak_kb']} KiB" if "peak_kb" in total else "-"
+            print(
+                f"{name:<20}{total['count']:>6}{total['wall_s'] * 1000:>8.1f} ms"
+                f"{total['cpu_s'] * 1000:>8.1f} ms{total['items']:>9}{peak:>11}"
+            )
+            if total["slowest"] is not None and total["count"] > 1:
+                print(
+                    f"{'':<20}slowest {total['slowest']['workbook']} "
+                    f"{total['slowest']['wall_s'] * 1000:.1f} ms"
+                )
@@ -0,0 +1,96 @@
+"""
+persistent build state for generate_cache.py
+records a content hash of the raw inputs of every (course, sem, phase) and
+the parsed results they produced, so unchanged workbooks are not re-parsed.
+state lives in ./.cache (not published)
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from typing import Any, Dict, List, Optional
+
+CACHE_DIR = ".cache"
+STATE_FILE = os.path.join(CACHE_DIR, "build_state.json")
+EVENTS_DIR = os.path.join(CACHE_DIR, "events")
+
+# bump whenever get_events/get_electives change what they produce,
+# so results cached by an older version are not reused
+STATE_VERSION = 2
+
+
+def file_hash(path: Optional[str]) -> str:
+    if not path or not os.path.isfile(path):
+        return "-"
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+def inputs_hash(paths: List[Optional[str]]) -> str:
+    h = hashlib.sha256(f"state-v{STATE_VERSION}".encode())
+    for path in paths:
+        h.update(file_hash(path).encode())
+
+    return h.hexdigest()
+
+
+def load_state() -> Dict[str, Any]:
+    try:
+        with open(STATE_FILE, "r") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {}
+
+    state.setdefault("events", {})
+    state.setdefault("ical", {})
+    return state
+
+
+def save_state(state: Dict[str, Any]) -> None:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w+") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, STATE_FILE)
+
+
+def load_cached(state: Dict[str, Any], key: str, digest: str) -> Any:
+    """Return the stored results for key if they were built from digest"""
+    if state["events"].get(key) != digest:
+        return None
+
+    try:
+        with open(os.path.join(EVENTS_DIR, f"{key}.pickle"), "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # missing or unreadable (e.g. parser classes changed), rebuild
+        return None
+
+
+def store_cached(state: Dict[str, Any], key: str, digest: str, value: Any) -> None:
+    os.makedirs(EVENTS_DIR, exist_ok=True)
+    with open(os.path.join(EVENTS_DIR, f"{key}.pickle"), "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    state["events"][key] = digest
+
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    """Write data to path unless the file already holds exactly these bytes"""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+
+    with open(path, "wb") as f:
+        f.write(data)
+
+    return True
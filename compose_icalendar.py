@@ -0,0 +1,178 @@
+"""
+personalized icalenders: a batch's core classes plus only the electives the
+student picked, as one .ics
+every event is serialized once per phase into a VEVENT fragment and kept, a
+calendar is the header, the cached fragments of its events and the footer,
+so thousands of distinct calendars cost no more than string joins.
+
+    python compose_icalendar.py btech-128_sem5_phase1_f7 26B12CS312 26B12CS317 -o f7.ics
+"""
+
+import datetime
+import json
+from typing import Dict, Iterable, List, Tuple
+
+from generate_icalendar import (STAMP_FORMAT, calendar_lines, event_date,
+                                join_lines, now_stamp, stable_stamp,
+                                utc_stamp, vevent_lines)
+
+FOOTER = b"END:VCALENDAR\r\n"
+
+
+def fragment_key(day_name: str, ev: dict) -> tuple:
+    return (
+        day_name,
+        ev["start"],
+        ev["end"],
+        ev["subject"],
+        ev["subjectcode"],
+        ev["teacher"],
+        ev["venue"],
+        ev["type"],
+        tuple(ev["batches"]),
+    )
+
+
+class CalendarComposer:
+    """Builds personalized calendars out of classes, VEVENT fragments are
+    memoized per phase ({course_id}_{sem_id}_{phase_id})
+    stamp and term work as in generate_icalendars, with
+    stamp=stable_stamp(term) calendars only change with their events"""
+
+    def __init__(
+        self,
+        classes: dict,
+        stamp: datetime.datetime | None = None,
+        term: datetime.date | None = None,
+    ):
+        if stamp is None:
+            stamp = now_stamp()
+        self.classes = classes
+        self.stamp = stamp
+        self.term = term
+        self.dtstamp = utc_stamp(stamp)
+        self.fragments: Dict[str, Dict[tuple, bytes]] = {}
+
+    @classmethod
+    def for_term(cls, classes: dict, term: datetime.date | None = None):
+        """Stamped with stable_stamp(term) when there is a term, as the
+        calendars of generate_icalendars(stable=True), else with the time"""
+        if term is None:
+            return cls(classes)
+        return cls(classes, stable_stamp(term), term)
+
+    @property
+    def etag(self) -> str:
+        """Changes whenever the bytes of a composed calendar may change for
+        the same classes, the stamp shows up in every calendar"""
+        return self.stamp.strftime(STAMP_FORMAT)
+
+    def fragment(
+        self, elective_key: str, day_name: str, ev: dict
+    ) -> Tuple[tuple, bytes]:
+        fragments = self.fragments.setdefault(elective_key, {})
+        key = fragment_key(day_name, ev)
+        data = fragments.get(key)
+        if data is None:
+            # batches are part of the key, so the uid needs no batch id
+            uid = "_".join(
+                (
+                    elective_key,
+                    day_name,
+                    ev["start"],
+                    ev["subjectcode"],
+                    ev["type"],
+                    ev["venue"],
+                )
+            )
+            date = event_date(self.stamp, day_name, self.term)
+            data = b""
+            if date is not None:
+                data = join_lines(vevent_lines(ev, uid, date, self.dtstamp))
+            fragments[key] = data
+        return key, data
+
+    def offered(self, class_batch_key: str) -> List[str]:
+        """Elective subject codes in the batch's schedule"""
+        days = self.classes[class_batch_key]["classes"]
+        return sorted(
+            {
+                ev["subjectcode"]
+                for day_events in days.values()
+                for ev in day_events
+                if ev["is_elective"]
+            }
+        )
+
+    def compose(self, class_batch_key: str, electives: Iterable[str] = ()) -> bytes:
+        """Calendar of the batch with only the chosen elective subject codes,
+        raises KeyError for unknown batches and ValueError for codes the
+        batch is not offered"""
+        chosen = set(electives)
+        unknown = chosen.difference(self.offered(class_batch_key))
+        if unknown:
+            raise ValueError(
+                f"not offered to {class_batch_key}: {', '.join(sorted(unknown))}"
+            )
+
+        elective_key, batch_id = class_batch_key.rsplit("_", 1)
+        course_id, sem_id, phase_id = elective_key.split("_")
+        header = calendar_lines(
+            f"-//JIIT Planner//Timetable {course_id} {sem_id} {phase_id} {batch_id}//EN",
+            f"JIIT {course_id.upper()} {sem_id.upper()} {phase_id.upper()} "
+            f"{batch_id.upper()} Timetable",
+            self.stamp,
+        )
+        parts = [join_lines(header)]
+        seen = set()
+        for day_name, day_events in self.classes[class_batch_key]["classes"].items():
+            for ev in day_events:
+                if ev["is_elective"] and ev["subjectcode"] not in chosen:
+                    continue
+                key, data = self.fragment(elective_key, day_name, ev)
+                # sheets sometimes list one class twice, a uid may appear once
+                if key not in seen:
+                    seen.add(key)
+                    parts.append(data)
+
+        parts.append(FOOTER)
+        return b"".join(parts)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="a batch calendar with only the chosen electives"
+    )
+    parser.add_argument("batch", help="class batch key, e.g. btech-128_sem5_phase1_f7")
+    parser.add_argument("electives", nargs="*", help="chosen elective subject codes")
+    parser.add_argument("-o", "--output", help="write to a file instead of stdout")
+    parser.add_argument(
+        "--list", action="store_true", help="list the electives offered to the batch"
+    )
+    parser.add_argument(
+        "--term-start",
+        type=datetime.date.fromisoformat,
+        help="first day of classes (YYYY-MM-DD), stamps the calendar like --stable-ical",
+    )
+    args = parser.parse_args()
+
+    with open("classes.json", "r") as f:
+        composer = CalendarComposer.for_term(json.load(f), args.term_start)
+
+    try:
+        if args.list:
+            print("\n".join(composer.offered(args.batch)))
+            raise SystemExit(0)
+        calendar = composer.compose(args.batch, args.electives)
+    except KeyError:
+        raise SystemExit(f"unknown batch {args.batch}")
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(calendar)
+    else:
+        print(calendar.decode(), end="")
@@ -1,10 +1,24 @@
+import argparse
 import datetime
+import hashlib
 import json
 import os
-from typing import Dict, List
-
-from generate_curriculum import curriculum
-from generate_icalendar import generate_icalendars_json
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Set
+
+import build_state
+import sheet_cache
+from build_report import REPORT_FILE, BuildReport
+from generate_compressed import generate_compressed
+from generate_conflicts import CONFLICTS, generate_conflicts
+from generate_curriculum import load_course_index
+from generate_deltas import DELTAS, generate_deltas
+from generate_faculty import FACULTY_DIR, generate_faculty
+from generate_icalendar import generate_icalendars
+from generate_manifest import generate_manifest
+from generate_v2 import V2_FILE, generate_v2
+from generate_venues import VENUES, generate_venues
 from jiit_tt_parser.parser import parse_events
 from jiit_tt_parser.parser.parse_events import Elective, Event
 from jiit_tt_parser.parser.parse_faculty import (
@@ -14,7 +28,13 @@ from jiit_tt_parser.utils import load_worksheet
 
 TIME_TABLE = os.path.join("raw", "time_tables")
 FACULTY = os.path.join("raw", "faculty")
+SHARDS = "classes"
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 electives_file = "./raw/electives/electives.xlsx"
+CURRICULUM = "curriculum.json"
+# curriculum.json with every code under its partial forms, read by parse_events
+PARSER_CURRICULUM = os.path.join(build_state.CACHE_DIR, "curriculum.json")
+COURSE_MAPPINGS = "course_mappings.json"
 
 
 def maps():
@@ -65,42 +85,127 @@ def split_on_number(key: str):
     return key, 0
 
 
-def get_faculty_map():
-    fac1_xl_path = "./raw/faculty/10. Faculty Abbreviations_Even 2025.xlsx"
-    fac2_xl_path = "./raw/faculty/Faculty Abbreviations EVEN 2026.xlsx"
-    sem1_xl_path = "./raw/faculty/1. BTech II Sem _Even 2025.xlsx"
-    bca1_xl_path = "./raw/faculty/6. BCA II Sem and IV Sem_Even 2025.xlsx"
-    fac128_xl_path = "./raw/faculty/1.xlsx"
-    fac128_xl_path_2 = "./raw/faculty/1 (copy 1).xlsx"
-
-    faculty_map_62 = {}
-    faculty_map_128 = {}
-    faculty_map_62.update(generate_faculty_map(fac1_xl_path))
-    faculty_map_62.update(generate_faculty_map(fac2_xl_path))
-    faculty_map_62.update(get_faculty_map_from_sem1(sem1_xl_path))
-    faculty_map_62.update(get_faculty_map_from_bca1_N_128(bca1_xl_path))
-    faculty_map_128.update(get_faculty_map_from_bca1_N_128(fac128_xl_path))
-    faculty_map_128.update(get_faculty_map_from_128_sem4(fac128_xl_path_2))
-
-    with open("faculty_62.json", "w+") as f:
-        json.dump(faculty_map_62, f)
-    with open("faculty_128.json", "w+") as f:
-        json.dump(faculty_map_128, f)
+def batch_sort_key(batch: str):
+    # split_on_number order, ties (e.g. "F1"/"F01") broken on the name
+    return (*split_on_number(batch), batch)
+
+
+FACULTY_SOURCES = [
+    (
+        "faculty_62.json",
+        generate_faculty_map,
+        "./raw/faculty/10. Faculty Abbreviations_Even 2025.xlsx",
+    ),
+    (
+        "faculty_62.json",
+        generate_faculty_map,
+        "./raw/faculty/Faculty Abbreviations EVEN 2026.xlsx",
+    ),
+    (
+        "faculty_62.json",
+        get_faculty_map_from_sem1,
+        "./raw/faculty/1. BTech II Sem _Even 2025.xlsx",
+    ),
+    (
+        "faculty_62.json",
+        get_faculty_map_from_bca1_N_128,
+        "./raw/faculty/6. BCA II Sem and IV Sem_Even 2025.xlsx",
+    ),
+    (
+        "faculty_128.json",
+        get_faculty_map_from_bca1_N_128,
+        "./raw/faculty/1.xlsx",
+    ),
+    (
+        "faculty_128.json",
+        get_faculty_map_from_128_sem4,
+        "./raw/faculty/1 (copy 1).xlsx",
+    ),
+]
+FACULTY_CACHE = os.path.join(build_state.CACHE_DIR, "faculty")
+FACULTY_JSON = {
+    "btech-128": "faculty_128.json",
+    "btech-62": "faculty_62.json",
+    "bca-62": "faculty_62.json",
+}
+
+
+def faculty_json_for(course_id: str, default: str = "") -> str:
+    """FACULTY_JSON entry of the course, other courses (e.g. the
+    generate_synthetic ones, syn1-62) go by their campus suffix"""
+    if course_id in FACULTY_JSON:
+        return FACULTY_JSON[course_id]
+
+    campus = f"faculty_{course_id.rsplit('-', 1)[-1]}.json"
+    return campus if campus in FACULTY_JSON.values() else default
+
+
+def get_faculty_map(jobs: int = 1):
+    """Build faculty_62.json & faculty_128.json from FACULTY_SOURCES.
+    Each source is parsed only when its file hash has no cached map,
+    missing sources are parsed concurrently, and the json files are
+    rewritten only when the merged map changed."""
+    os.makedirs(FACULTY_CACHE, exist_ok=True)
+
+    cache_paths = []
+    pending = []
+    for _, parse, path in FACULTY_SOURCES:
+        cache_path = os.path.join(
+            FACULTY_CACHE, f"{parse.__name__}-{build_state.file_hash(path)}.json"
+        )
+        cache_paths.append(cache_path)
+        if not os.path.isfile(cache_path):
+            pending.append((parse, path, cache_path))
+
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as pool:
+            futures = [
+                (pool.submit(parse, path), cache_path)
+                for parse, path, cache_path in pending
+            ]
+            parsed = [(future.result(), cache_path) for future, cache_path in futures]
+    else:
+        parsed = [(parse(path), cache_path) for parse, path, cache_path in pending]
+
+    for faculty_map, cache_path in parsed:
+        # moved into place once complete, an interrupted run must not leave
+        # a truncated map under a hash that still matches
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "w+") as f:
+            json.dump(faculty_map, f)
+        os.replace(tmp, cache_path)
+
+    faculty_maps: Dict[str, dict] = {}
+    for (faculty_json, _, _), cache_path in zip(FACULTY_SOURCES, cache_paths):
+        with open(cache_path, "r") as f:
+            faculty_maps.setdefault(faculty_json, {}).update(json.load(f))
+
+    for faculty_json, faculty_map in faculty_maps.items():
+        build_state.write_if_changed(faculty_json, json.dumps(faculty_map).encode())
 
 
 def get_curriculum_map():
-    e = curriculum()
-    with open("curriculum.json", "w+") as f:
-        json.dump(e, f)
+    """Write PARSER_CURRICULUM, the expanded copy of the compact curriculum.json"""
+    with open(CURRICULUM, "r") as f:
+        e = json.load(f)
+    e["courses"] = load_course_index(CURRICULUM).expanded()
+    os.makedirs(build_state.CACHE_DIR, exist_ok=True)
+    build_state.write_if_changed(PARSER_CURRICULUM, json.dumps(e).encode())
 
 
 def get_events(
-    branch_xl: str | None, faculty_json: str, course_context: str = ""
+    branch_xl: str | None,
+    faculty_json: str,
+    course_context: str = "",
+    use_sheet_cache: bool = False,
 ) -> tuple[List[Event | Elective], List[str]]:
     if not branch_xl:
         return [], []
 
-    ws = load_worksheet(branch_xl)
+    if use_sheet_cache:
+        ws = sheet_cache.load_cached_worksheet(branch_xl)
+    else:
+        ws = load_worksheet(branch_xl)
     if ws is None:
         return [], []
 
@@ -111,17 +216,17 @@ def get_events(
         r,
         c,
         faculty_json,
-        "curriculum.json",
+        PARSER_CURRICULUM,
         course_context,
     )
     batches = set()
     for ev in evs:
         if ev is not None:
             # print(ev)
-            batches = batches.union(ev.batches)
+            batches.update(ev.batches)
 
     batches.discard("ALL")
-    sorted_batches = sorted(batches, key=split_on_number)
+    sorted_batches = sorted(batches, key=batch_sort_key)
     for ev in evs:
         if ev is not None and "ALL" in ev.batches:
             ev.batches = sorted_batches
@@ -129,6 +234,23 @@ def get_events(
     return evs, sorted_batches
 
 
+def serialize_event(ev: Event) -> dict:
+    data = {}
+    data["is_elective"] = False
+    data["start"] = ev.period.start_time.strftime("%I:%M %p")
+    data["end"] = ev.period.end_time.strftime("%I:%M %p")
+
+    data["day"] = ev.day.lower()
+    data["subject"] = ev.event or ev.eventcode
+    data["subjectcode"] = ev.eventcode
+    data["teacher"] = ", ".join(ev.lecturer)
+    data["batches"] = ev.batches
+    data["venue"] = ev.classroom
+    data["type"] = ev.event_type
+
+    return data
+
+
 def filter_events(evs: List[Event | Elective], batch: str, day: str) -> List[dict]:
     filtered_evs = []
 
@@ -143,36 +265,28 @@ def filter_events(evs: List[Event | Elective], batch: str, day: str) -> List[dic
 
         if (day is not None) and (not ev.day.lower() == day.lower()):
             continue
-        data = {}
-        data["is_elective"] = False
-        data["start"] = ev.period.start_time.strftime("%I:%M %p")
-        data["end"] = ev.period.end_time.strftime("%I:%M %p")
 
-        data["day"] = ev.day.lower()
-        data["subject"] = ev.event or ev.eventcode
-        data["subjectcode"] = ev.eventcode
-        data["teacher"] = ", ".join(ev.lecturer)
-        data["batches"] = ev.batches
-        data["venue"] = ev.classroom
-        data["type"] = ev.event_type
-
-        filtered_evs.append(data)
+        filtered_evs.append(serialize_event(ev))
 
     return filtered_evs
 
 
-def get_prefix_batches(batches: List[str], prefix: str):
-    pbatches = []
+def build_prefix_index(batches: List[str]) -> List[str]:
+    return sorted(batches)
+
 
-    for batch in batches:
-        if batch.startswith(prefix):
-            pbatches.append(batch)
+def get_prefix_batches(index: List[str], prefix: str) -> List[str]:
+    """Batches starting with prefix, index being a build_prefix_index result"""
+    start = end = bisect_left(index, prefix)
+    while end < len(index) and index[end].startswith(prefix):
+        end += 1
 
-    return pbatches
+    return index[start:end]
 
 
 def get_electives(evs: List[Event | Elective], batches: List[str]) -> List[dict]:
     filtered_evs = []
+    index = build_prefix_index(batches)
 
     for ev in evs:
         # print(ev)
@@ -192,8 +306,10 @@ def get_electives(evs: List[Event | Elective], batches: List[str]) -> List[dict]
         data["teacher"] = ", ".join(ev.lecturer)
         data["day"] = ev.day.lower()
 
+        expanded = set(ev.batches)
         for bcat in ev.batch_cats:
-            ev.batches = list(set(ev.batches).union(get_prefix_batches(batches, bcat)))
+            expanded.update(get_prefix_batches(index, bcat))
+        ev.batches = sorted(expanded, key=batch_sort_key)
 
         if len(ev.batches) == 0:
             ev.batches = batches
@@ -221,11 +337,179 @@ def filter_electives(evs: List[dict], batch: str, day: str) -> List[dict]:
     return filtered_evs
 
 
-def generate_json():
-    CACHE_VERSION = datetime.datetime.today().strftime("v%Y.%m.%d.%H.%M.%S")
-    branches, semesters, phases, excels = maps()
+def check_sheet_cache() -> List[str]:
+    """Parse every workbook in raw/time_tables with openpyxl and through the
+    sheet cache, returns the phases whose events differ"""
+    get_curriculum_map()
+    _, _, _, excels = maps()
+    mismatched = []
+    for elective_key, excel_path in sorted(excels.items()):
+        faculty_json = faculty_json_for(elective_key.split("_", 1)[0])
+        results = []
+        for use_sheet_cache in (False, True):
+            evs, batches, electives = parse_phase(
+                excel_path, faculty_json, elective_key, use_sheet_cache
+            )
+            core = [
+                serialize_event(ev)
+                for ev in evs
+                if ev is not None and not isinstance(ev, Elective)
+            ]
+            results.append((batches, core, electives))
+        if results[0] != results[1]:
+            mismatched.append(elective_key)
+
+    return mismatched
+
+
+def phase_digest(excel_path: str | None, faculty_json: str) -> str:
+    return build_state.inputs_hash(
+        [excel_path, faculty_json, PARSER_CURRICULUM, COURSE_MAPPINGS, electives_file]
+    )
+
+
+def parse_phase(
+    excel_path: str | None,
+    faculty_json: str,
+    elective_key: str,
+    use_sheet_cache: bool = False,
+    report: BuildReport | None = None,
+) -> tuple[List[Event | Elective], List[str], List[dict]]:
+    report = report or BuildReport()
+    with report.stage("get_events", elective_key) as entry:
+        evs, batches = get_events(
+            excel_path, faculty_json, elective_key, use_sheet_cache
+        )
+        entry["items"] = sum(ev is not None for ev in evs)
+        entry["batches"] = len(batches)
+
+    with report.stage("get_electives", elective_key) as entry:
+        electives = get_electives(evs, batches)
+        entry["items"] = len(electives)
+
+    return evs, batches, electives
+
+
+def parse_phase_reported(
+    excel_path: str | None,
+    faculty_json: str,
+    elective_key: str,
+    use_sheet_cache: bool = False,
+    trace_memory: bool = False,
+) -> tuple[tuple[List[Event | Elective], List[str], List[dict]], List[dict]]:
+    """parse_phase in a worker process, returns its result and report entries"""
+    report = BuildReport(trace_memory)
+    result = parse_phase(excel_path, faculty_json, elective_key, use_sheet_cache, report)
+    return result, report.stages
+
+
+def parse_phases(
+    phase_list: List[tuple[str, str | None, str]],
+    state: dict | None = None,
+    jobs: int = 1,
+    use_sheet_cache: bool = False,
+    report: BuildReport | None = None,
+) -> Dict[str, tuple[List[Event | Elective], List[str], List[dict]]]:
+    """parse_phase for every (elective_key, excel_path, faculty_json),
+    reusing the build state for phases whose inputs did not change and
+    spreading the rest over `jobs` worker processes"""
+    report = report or BuildReport()
+    results = {}
+    pending = []
+    for elective_key, excel_path, faculty_json in phase_list:
+        digest = phase_digest(excel_path, faculty_json)
+        if state is not None:
+            cached = build_state.load_cached(state, elective_key, digest)
+            if cached is not None:
+                results[elective_key] = cached
+                continue
+        pending.append((elective_key, excel_path, faculty_json, digest))
+
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as pool:
+            futures = {
+                elective_key: pool.submit(
+                    parse_phase_reported,
+                    excel_path,
+                    faculty_json,
+                    elective_key,
+                    use_sheet_cache,
+                    report.trace_memory,
+                )
+                for elective_key, excel_path, faculty_json, _ in pending
+            }
+            parsed = {}
+            for key, future in futures.items():
+                parsed[key], entries = future.result()
+                report.extend(entries)
+    else:
+        parsed = {
+            elective_key: parse_phase(
+                excel_path, faculty_json, elective_key, use_sheet_cache, report
+            )
+            for elective_key, excel_path, faculty_json, _ in pending
+        }
+    report.info["cached_phases"] = len(phase_list) - len(pending)
+
+    for elective_key, _, _, digest in pending:
+        results[elective_key] = parsed[elective_key]
+        if state is not None:
+            build_state.store_cached(state, elective_key, digest, parsed[elective_key])
+
+    return results
+
+
+def bucket_events(
+    evs: List[Event | Elective], electives: List[dict]
+) -> Dict[tuple[str, str], List[dict]]:
+    """Group events by (batch, lowercase day) in a single pass.
+    Each Event is serialized once; per bucket the core events come first,
+    in evs order, followed by the electives, the same lists that
+    filter_events + filter_electives produce for that batch and day"""
+    core: Dict[tuple[str, str], List[dict]] = {}
+    for ev in evs:
+        if ev is None or isinstance(ev, Elective):
+            continue
+
+        data = serialize_event(ev)
+        for batch in dict.fromkeys(ev.batches):
+            core.setdefault((batch, data["day"]), []).append(data)
+
+    buckets: Dict[tuple[str, str], List[dict]] = {}
+    for ev in electives:
+        day = ev["day"].lower()
+        for batch in dict.fromkeys(ev["batches"]):
+            buckets.setdefault((batch, day), []).append(ev)
+
+    for key, elective_evs in buckets.items():
+        core[key] = core.get(key, []) + elective_evs
+
+    return core
+
+
+def content_version(*docs) -> str:
+    """cacheVersion derived from the normalized outputs, so identical
+    inputs keep the same version"""
+    h = hashlib.sha256()
+    for data in docs:
+        h.update(json.dumps(data, sort_keys=True).encode())
+
+    return "v" + h.hexdigest()[:16]
+
+
+def generate_json(
+    incremental: bool = True,
+    jobs: int = 1,
+    use_sheet_cache: bool = False,
+    report: BuildReport | None = None,
+):
+    report = report or BuildReport()
+    with report.stage("maps") as entry:
+        get_curriculum_map()
+        branches, semesters, phases, excels = maps()
+        entry["items"] = len(excels)
     metadata = {
-        "cacheVersion": CACHE_VERSION,
+        "cacheVersion": "",
         "courses": [],
         "semesters": {},
         "phases": {},
@@ -234,12 +518,12 @@ def generate_json():
     classes = {
         "electives": {},
     }
+    state = build_state.load_state() if incremental else None
+    phase_list = []
+    phase_ids = {}
     faculty_json = ""
     for course_id, course in branches.items():
-        if course_id == "btech-128":
-            faculty_json = "faculty_128.json"
-        elif course_id == "btech-62" or course_id == "bca-62":
-            faculty_json = "faculty_62.json"
+        faculty_json = faculty_json_for(course_id, faculty_json)
         metadata["courses"].append({"id": course_id, "name": course})
         metadata["semesters"][course_id] = []
         metadata["batches"][course_id] = {}
@@ -256,56 +540,335 @@ def generate_json():
                     {"id": phase_id, "name": str(phase)}
                 )
                 metadata["batches"][course_id][sem_id][phase_id] = []
-                excel_path = excels.get("_".join((course_id, sem_id, phase_id)))
                 elective_key = "_".join((course_id, sem_id, phase_id))
-                evs, batches = get_events(excel_path, faculty_json, elective_key)
-                print(batches)
-                electives = get_electives(evs, batches)
-                classes["electives"][elective_key] = electives
+                phase_list.append((elective_key, excels.get(elective_key), faculty_json))
+                phase_ids[elective_key] = (course_id, sem_id, phase_id)
+
+    parsed = parse_phases(phase_list, state, jobs, use_sheet_cache, report)
+
+    for elective_key, _, _ in phase_list:
+        course_id, sem_id, phase_id = phase_ids[elective_key]
+        evs, batches, electives = parsed[elective_key]
+        classes["electives"][elective_key] = electives
+        with report.stage("bucket_events", elective_key) as entry:
+            buckets = bucket_events(evs, electives)
+            entry["items"] = len(buckets)
+
+        for batch in batches:
+            batch_id = batch.lower()
+            metadata["batches"][course_id][sem_id][phase_id].append(
+                {"id": batch_id, "name": batch}
+            )
+            class_batch_key = "_".join((elective_key, batch_id))
+            classes[class_batch_key] = {
+                "cacheVersion": "",
+                "classes": {},
+            }
+            for day in DAYS:
+                classes[class_batch_key]["classes"][day] = list(
+                    buckets.get((batch, day.lower()), ())
+                )
 
-                for batch in batches:
-                    batch_id = batch.lower()
-                    metadata["batches"][course_id][sem_id][phase_id].append(
-                        {"id": batch_id, "name": batch}
-                    )
-                    class_batch_key = "_".join((course_id, sem_id, phase_id, batch_id))
-                    classes[class_batch_key] = {
-                        "cacheVersion": CACHE_VERSION,
-                        "classes": {},
-                    }
-                    for day in [
-                        "Monday",
-                        "Tuesday",
-                        "Wednesday",
-                        "Thursday",
-                        "Friday",
-                        "Saturday",
-                        "Sunday",
-                    ]:
-                        classes[class_batch_key]["classes"][day] = filter_events(
-                            evs, batch, day
-                        )
-                        classes[class_batch_key]["classes"][day].extend(
-                            filter_electives(electives, batch, day)
-                        )
+    if state is not None:
+        build_state.save_state(state)
+
+    # every batch entry carries the build-wide version, as metadata.json does
+    metadata["cacheVersion"] = content_version(metadata, classes)
+    for key, data in classes.items():
+        if key != "electives":
+            data["cacheVersion"] = metadata["cacheVersion"]
 
     return metadata, classes
 
 
-if __name__ == "__main__":
-    get_faculty_map()
+def write_shards(metadata: dict, classes: dict, out_dir: str = SHARDS) -> int:
+    """Write one file per batch and one electives file per phase as
+    {out_dir}/{course_id}/{sem_id}/{phase_id}/{batch_id}.json and
+    {out_dir}/{course_id}/{sem_id}/{phase_id}/electives.json,
+    and point metadata at them with the path and a hash of each shard.
+    Shards carry no cacheVersion, so a shard only changes with its own
+    data. Unchanged shards are not rewritten and shards of batches that
+    no longer exist are removed."""
+    written = set()
+    changed = 0
+    metadata["electives"] = {}
+
+    def dump(path: str, data: dict) -> str:
+        nonlocal changed
+        written.add(os.path.normpath(path))
+        body = json.dumps(data).encode()
+        if build_state.write_if_changed(path, body):
+            changed += 1
+        return hashlib.sha256(body).hexdigest()[:16]
+
+    for course_id, sems in metadata["batches"].items():
+        metadata["electives"][course_id] = {}
+        for sem_id, phases in sems.items():
+            metadata["electives"][course_id][sem_id] = {}
+            for phase_id, batches in phases.items():
+                phase_dir = "/".join((out_dir, course_id, sem_id, phase_id))
+                os.makedirs(phase_dir, exist_ok=True)
 
-    metadata, classes = generate_json()
-    # import sys
-    # json.dump(metadata, sys.stdout)
-    # json.dump(classes, sys.stdout)
-
-    # generate_icalendars(classes) use when classes data fixed
+                elective_key = "_".join((course_id, sem_id, phase_id))
+                electives_path = f"{phase_dir}/electives.json"
+                electives_hash = dump(
+                    electives_path,
+                    {"electives": classes["electives"].get(elective_key, [])},
+                )
+                metadata["electives"][course_id][sem_id][phase_id] = {
+                    "path": electives_path,
+                    "hash": electives_hash,
+                }
 
-    with open("classes.json", "w+") as f:
-        json.dump(classes, f)
-    with open("metadata.json", "w+") as f:
-        json.dump(metadata, f)
+                for batch in batches:
+                    batch_path = f"{phase_dir}/{batch['id']}.json"
+                    data = classes["_".join((elective_key, batch["id"]))]
+                    batch["hash"] = dump(batch_path, {"classes": data["classes"]})
+                    batch["path"] = batch_path
+
+    remove_shards(out_dir, written)
+    return changed
+
+
+def remove_shards(out_dir: str = SHARDS, keep: Set[str] | None = None) -> int:
+    """Remove the shards under out_dir not in keep, returns how many"""
+    keep = keep or set()
+    removed = 0
+    for root, _, files in os.walk(out_dir):
+        for file in files:
+            path = os.path.normpath(os.path.join(root, file))
+            if file.endswith(".json") and path not in keep:
+                os.remove(path)
+                removed += 1
+
+    return removed
+
+
+def run_pipeline(
+    output: str = "json",
+    jobs: int = 1,
+    incremental: bool = True,
+    use_sheet_cache: bool = False,
+    stable_ical: bool = False,
+    fast_ical: bool = False,
+    compress: bool = False,
+    v2: bool = False,
+    deltas: bool = False,
+    venues: bool = False,
+    faculty: bool = False,
+    conflicts: bool = False,
+    term_start: datetime.date | None = None,
+    report: BuildReport | None = None,
+):
+    """Full refresh: faculty maps, classes/metadata and icalenders.
+    The ics stage is handed the in-memory classes from generate_json,
+    classes.json is only written for publishing, never read back.
+    Every stage is timed into report, written to REPORT_FILE at the end."""
+    report = report or BuildReport()
+
+    with report.stage("get_faculty_map") as entry:
+        get_faculty_map(jobs=jobs)
+        entry["items"] = len(FACULTY_SOURCES)
+
+    metadata, classes = generate_json(
+        incremental=incremental,
+        jobs=jobs,
+        use_sheet_cache=use_sheet_cache,
+        report=report,
+    )
+    batch_count = len(classes) - 1
+
+    if output in ("shards", "both"):
+        with report.stage("write_shards") as entry:
+            changed = write_shards(metadata, classes)
+            entry["items"] = changed
+        print(f"{changed} shards written to ./{SHARDS}")
+    else:
+        # left by an earlier shards run, metadata.json no longer points at
+        # them and they would still be compressed and listed in the manifest
+        removed = remove_shards(SHARDS)
+        if removed:
+            print(f"{removed} shards removed from ./{SHARDS}")
+
+    with report.stage("json_dumps") as entry:
+        data = json.dumps(metadata).encode()
+        build_state.write_if_changed("metadata.json", data)
+        entry["bytes"] = len(data)
+        if output in ("json", "both"):
+            data = json.dumps(classes).encode()
+            build_state.write_if_changed("classes.json", data)
+            entry["bytes"] += len(data)
+        elif os.path.isfile("classes.json"):
+            # a stale classes.json would be published, and served, as current
+            os.remove("classes.json")
+            print("classes.json of an earlier run removed")
+        entry["items"] = batch_count
+
+    if v2:
+        with report.stage("generate_v2") as entry:
+            generate_v2(classes)
+            entry["items"] = batch_count
+    if deltas:
+        with report.stage("generate_deltas") as entry:
+            index = generate_deltas(classes, metadata["cacheVersion"])
+            entry["items"] = batch_count
+        if index is not None:
+            print(
+                f"delta {index['from']} -> {index['to']}: "
+                f"{len(index['changed'])} changed, {len(index['added'])} added, "
+                f"{len(index['removed'])} removed batches"
+            )
+
+    if venues:
+        with report.stage("generate_venues") as entry:
+            index = generate_venues(classes)
+            entry["items"] = len(index["venues"])
+
+    if conflicts:
+        with report.stage("generate_conflicts") as entry:
+            entry["items"] = len(generate_conflicts(classes)["phases"])
+
+    if faculty:
+        with report.stage("generate_faculty") as entry:
+            entry["items"] = generate_faculty(classes, stable_ical, term_start)
 
     # Generate iCalendar files
-    generate_icalendars_json("classes.json")
+    with report.stage("generate_icalendars") as entry:
+        generate_icalendars(classes, stable_ical, fast_ical, jobs, term_start)
+        entry["items"] = batch_count
+
+    with report.stage("generate_manifest"):
+        generate_manifest(metadata["cacheVersion"])
+
+    if compress:
+        with report.stage("generate_compressed"):
+            generate_compressed(jobs)
+
+    report.info["cacheVersion"] = metadata["cacheVersion"]
+    report.info["jobs"] = jobs
+    report.write(REPORT_FILE)
+
+    return metadata, classes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="generate classes.json & metadata.json")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="ignore the build state and re-parse every workbook",
+    )
+    parser.add_argument(
+        "--output",
+        choices=("json", "shards", "both"),
+        default="json",
+        help="write the monolithic classes.json, per-batch shards under ./classes, or both",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to parse timetable workbooks",
+    )
+    parser.add_argument(
+        "--sheet-cache",
+        action="store_true",
+        help="read workbooks through the cell-grid cache in .cache/sheets",
+    )
+    parser.add_argument(
+        "--check-sheet-cache",
+        action="store_true",
+        help="only compare get_events with and without --sheet-cache on raw/",
+    )
+    parser.add_argument(
+        "--stable-ical",
+        action="store_true",
+        help="stamp .ics files with the term start, only rewriting changed ones",
+    )
+    parser.add_argument(
+        "--term-start",
+        type=datetime.date.fromisoformat,
+        help="first day of classes (YYYY-MM-DD), .ics events start on or after it, "
+        "required by --stable-ical",
+    )
+    parser.add_argument(
+        "--fast-ical",
+        action="store_true",
+        help="write .ics files with the template serializer",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write .gz/.br siblings of the published outputs",
+    )
+    parser.add_argument(
+        "--v2",
+        action="store_true",
+        help=f"also write the compact, interned {V2_FILE}",
+    )
+    parser.add_argument(
+        "--deltas",
+        action="store_true",
+        help=f"write delta feeds from the previous build to ./{DELTAS}",
+    )
+    parser.add_argument(
+        "--venues",
+        action="store_true",
+        help=f"write the venue occupancy index {VENUES}",
+    )
+    parser.add_argument(
+        "--faculty",
+        action="store_true",
+        help=f"write per-faculty timetables to ./{FACULTY_DIR} and ./ical/faculty",
+    )
+    parser.add_argument(
+        "--conflicts",
+        action="store_true",
+        help=f"write the elective clash matrix {CONFLICTS}",
+    )
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        help=f"print the per-stage timings recorded in {REPORT_FILE}",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="record the tracemalloc peak of every stage (slower)",
+    )
+    args = parser.parse_args()
+
+    if args.stable_ical and args.term_start is None:
+        parser.error("--stable-ical needs --term-start")
+
+    if args.check_sheet_cache:
+        mismatched = check_sheet_cache()
+        if mismatched:
+            print(f"sheet cache DIFFERS from openpyxl for {len(mismatched)} phases")
+            for elective_key in mismatched:
+                print(f"  {elective_key}")
+        else:
+            print("sheet cache matches openpyxl for every workbook")
+        raise SystemExit(1 if mismatched else 0)
+
+    report = BuildReport(trace_memory=args.trace_memory)
+
+    run_pipeline(
+        output=args.output,
+        jobs=args.jobs,
+        incremental=not args.full,
+        use_sheet_cache=args.sheet_cache,
+        stable_ical=args.stable_ical,
+        fast_ical=args.fast_ical,
+        compress=args.compress,
+        v2=args.v2,
+        deltas=args.deltas,
+        venues=args.venues,
+        faculty=args.faculty,
+        conflicts=args.conflicts,
+        term_start=args.term_start,
+        report=report,
+    )
+    if args.summary:
+        report.print_summary()
@@ -0,0 +1,159 @@
+"""
+write precompressed .gz and .br siblings of the published outputs
+(classes.json, classes.v2.json, metadata.json, manifest.json, venues.json,
+conflicts.json, ./classes, ./deltas, ./faculty, ./ical) so the static host
+can serve Content-Encoding variants without compressing on the fly.
+only files whose content changed since the last run are recompressed.
+"""
+
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import build_state
+
+try:
+    import brotli
+except ImportError:  # .br siblings are skipped without the brotli package
+    brotli = None
+
+PUBLISHED = [
+    "classes.json",
+    "classes.v2.json",
+    "metadata.json",
+    "manifest.json",
+    "venues.json",
+    "conflicts.json",
+    "classes",
+    "deltas",
+    "faculty",
+    "ical",
+]
+EXTENSIONS = (".json", ".ics")
+
+
+def published_files() -> List[str]:
+    files = []
+    for path in PUBLISHED:
+        if os.path.isfile(path):
+            files.append(path)
+        elif os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(
+                    os.path.join(root, name) for name in names if name.endswith(EXTENSIONS)
+                )
+
+    return sorted(files)
+
+
+def compress_file(path: str) -> Tuple[str, int, int, int]:
+    """Write path.gz (and path.br), returns (path, raw, gz, br) sizes"""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # mtime=0 keeps the gzip header, and so the bytes, reproducible
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    build_state.write_if_changed(f"{path}.gz", gz)
+
+    br_size = 0
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        build_state.write_if_changed(f"{path}.br", br)
+        br_size = len(br)
+
+    return path, len(data), len(gz), br_size
+
+
+def sibling_sizes(path: str) -> Tuple[str, int, int, int]:
+    def size(p: str) -> int:
+        return os.path.getsize(p) if os.path.isfile(p) else 0
+
+    return path, size(path), size(f"{path}.gz"), size(f"{path}.br")
+
+
+def remove_stale_siblings() -> int:
+    siblings = []
+    for path in PUBLISHED:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                siblings.extend(os.path.join(root, name) for name in names)
+        else:
+            siblings.extend((f"{path}.gz", f"{path}.br"))
+
+    removed = 0
+    for sibling in siblings:
+        source, ext = os.path.splitext(sibling)
+        if ext in (".gz", ".br") and os.path.isfile(sibling) and not os.path.isfile(source):
+            os.remove(sibling)
+            removed += 1
+
+    return removed
+
+
+def print_report(sizes: List[Tuple[str, int, int, int]]) -> None:
+    groups: Dict[str, List[int]] = {}
+    for path, raw, gz, br in sizes:
+        totals = groups.setdefault(path.split(os.sep)[0], [0, 0, 0, 0])
+        totals[0] += 1
+        totals[1] += raw
+        totals[2] += gz
+        totals[3] += br
+
+    def ratio(raw: int, compressed: int) -> str:
+        return f"{raw / compressed:.1f}x" if compressed else "-"
+
+    print(f"{'output':<14}{'files':>6}{'raw':>11}{'gzip':>11}{'':>7}{'brotli':>11}")
+    for group, (count, raw, gz, br) in sorted(groups.items()):
+        print(
+            f"{group:<14}{count:>6}{raw:>11}{gz:>11}{ratio(raw, gz):>7}"
+            f"{br:>11}{ratio(raw, br):>7}"
+        )
+
+
+def generate_compressed(jobs: int = 1) -> None:
+    state = build_state.load_state()
+    previous = state.setdefault("compressed", {})
+    current = {}
+    pending = []
+    sizes = []
+
+    for path in published_files():
+        digest = build_state.file_hash(path)
+        current[path] = digest
+        up_to_date = previous.get(path) == digest and os.path.isfile(f"{path}.gz")
+        if brotli is not None:
+            up_to_date = up_to_date and os.path.isfile(f"{path}.br")
+
+        if up_to_date:
+            sizes.append(sibling_sizes(path))
+        else:
+            pending.append(path)
+
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            sizes.extend(pool.map(compress_file, pending, chunksize=16))
+    else:
+        sizes.extend(compress_file(path) for path in pending)
+
+    removed = remove_stale_siblings()
+    state["compressed"] = current
+    build_state.save_state(state)
+
+    if brotli is None:
+        print("brotli not installed, .br files skipped")
+    print(
+        f"{len(pending)} files compressed, {len(current) - len(pending)} unchanged, "
+        f"{removed} stale removed"
+    )
+    print_report(sizes)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="precompress published outputs")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes")
+    args = parser.parse_args()
+
+    generate_compressed(args.jobs)
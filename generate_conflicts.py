@@ -0,0 +1,228 @@
+"""
+elective clash matrix
+for every phase, which pairs of elective offerings (subject codes in
+classes["electives"]) overlap each other and for which batches, and per
+batch which offerings it can take and which of them overlap its core
+classes. found with one sweep over the day's intervals sorted by start, not
+by comparing all pairs.
+
+{
+  "phases": {
+    "{course_id}_{sem_id}_{phase_id}": {
+      "offerings": [subjectcode, ...],
+      "batch_sets": [[batch, ...], ...],
+      "pairs": [[offering, offering, day, start, end, batch_set], ...],
+      "batches": {
+        "{batch}": {
+          "available": [offering, ...],
+          "core": {offering: [[day, start, end, core subjectcode], ...]}
+        }
+      }
+    }
+  }
+}
+offerings are indexes into "offerings", start/end are minutes after midnight
+and give the overlapping part of the two classes. a pair only applies to the
+batches of its batch_set, the ones attending both classes.
+"""
+
+import json
+from typing import Dict, List, Tuple
+
+import build_state
+from generate_venues import event_interval, format_minutes
+
+CONFLICTS = "conflicts.json"
+
+# (start, end, offering or -1 for core classes, core subjectcode or the
+# index of the elective event)
+Interval = Tuple[int, int, int, str | int]
+
+
+def sweep(intervals: List[Interval]):
+    """Yield every overlapping (earlier, later, start, end) pair of one day
+    that involves at least one elective"""
+    active: List[Interval] = []
+    for current in sorted(intervals):
+        start, end, offering, _ = current
+        active = [other for other in active if other[1] > start]
+        for other in active:
+            if offering >= 0 or other[2] >= 0:
+                yield other, current, start, min(end, other[1])
+        active.append(current)
+
+
+def phase_pairs(
+    electives: List[dict], index: Dict[str, int]
+) -> Tuple[List[list], List[List[str]]]:
+    """Overlapping offering pairs of a phase with the batches attending both
+    classes, and the table of those batch sets"""
+    days: Dict[str, List[Interval]] = {}
+    for i, ev in enumerate(electives):
+        days.setdefault(ev["day"].lower(), []).append(
+            (*event_interval(ev), index[ev["subjectcode"]], i)
+        )
+
+    pairs: Dict[tuple, set] = {}
+    for day, intervals in days.items():
+        for a, b, start, end in sweep(intervals):
+            if a[2] == b[2]:
+                continue
+            shared = {batch.lower() for batch in electives[a[3]]["batches"]}
+            shared &= {batch.lower() for batch in electives[b[3]]["batches"]}
+            if shared:
+                key = (min(a[2], b[2]), max(a[2], b[2]), day, start, end)
+                pairs.setdefault(key, set()).update(shared)
+
+    batch_sets: Dict[tuple, int] = {}
+    rows = []
+    for key, batches in sorted(pairs.items()):
+        batch_set = batch_sets.setdefault(tuple(sorted(batches)), len(batch_sets))
+        rows.append([*key, batch_set])
+
+    return rows, [list(batch_set) for batch_set in batch_sets]
+
+
+def batch_conflicts(
+    core: Dict[str, List[dict]], electives: List[Tuple[int, dict]]
+) -> dict:
+    days: Dict[str, List[Interval]] = {}
+    for day_events in core.values():
+        for ev in day_events:
+            if not ev["is_elective"]:
+                days.setdefault(ev["day"].lower(), []).append(
+                    (*event_interval(ev), -1, ev["subjectcode"])
+                )
+    for offering, ev in electives:
+        days.setdefault(ev["day"].lower(), []).append(
+            (*event_interval(ev), offering, ev["subjectcode"])
+        )
+
+    core_clashes: Dict[int, set] = {}
+    for day, intervals in days.items():
+        for a, b, start, end in sweep(intervals):
+            # elective pairs are found once per phase by phase_pairs
+            if a[2] >= 0 and b[2] >= 0:
+                continue
+            elective, other = (b, a) if a[2] < 0 else (a, b)
+            core_clashes.setdefault(elective[2], set()).add((day, start, end, other[3]))
+
+    return {
+        "available": sorted({offering for offering, _ in electives}),
+        "core": {
+            str(offering): [list(clash) for clash in sorted(clashes)]
+            for offering, clashes in sorted(core_clashes.items())
+        },
+    }
+
+
+def build_conflicts(classes: dict) -> dict:
+    phases: Dict[str, dict] = {}
+    batch_keys: Dict[str, List[str]] = {}
+    for class_batch_key in classes:
+        if class_batch_key == "electives":
+            continue
+        elective_key, batch_id = class_batch_key.rsplit("_", 1)
+        batch_keys.setdefault(elective_key, []).append(batch_id)
+
+    for elective_key, electives in classes["electives"].items():
+        if not electives:
+            continue
+
+        offerings = sorted({ev["subjectcode"] for ev in electives})
+        index = {code: i for i, code in enumerate(offerings)}
+        by_batch: Dict[str, List[Tuple[int, dict]]] = {}
+        for ev in electives:
+            for batch in dict.fromkeys(ev["batches"]):
+                by_batch.setdefault(batch.lower(), []).append(
+                    (index[ev["subjectcode"]], ev)
+                )
+
+        pairs, batch_sets = phase_pairs(electives, index)
+        phases[elective_key] = {
+            "offerings": offerings,
+            "batch_sets": batch_sets,
+            "pairs": pairs,
+            "batches": {
+                batch_id: batch_conflicts(
+                    classes[f"{elective_key}_{batch_id}"]["classes"],
+                    by_batch.get(batch_id, []),
+                )
+                for batch_id in batch_keys.get(elective_key, [])
+            },
+        }
+
+    return {"phases": phases}
+
+
+def check_basket(
+    conflicts: dict, elective_key: str, batch_id: str, basket: List[str]
+) -> List[str]:
+    """Why the basket of elective subject codes does not fit the batch,
+    an empty list when it does"""
+    phase = conflicts["phases"].get(elective_key)
+    if phase is None:
+        return [f"{elective_key} has no electives"]
+    batch = phase["batches"].get(batch_id.lower())
+    if batch is None:
+        return [f"{batch_id} is not a batch of {elective_key}"]
+
+    index = {code: i for i, code in enumerate(phase["offerings"])}
+    problems = []
+    chosen = {}
+    for code in basket:
+        offering = index.get(code)
+        if offering is None or offering not in batch["available"]:
+            problems.append(f"{code} is not offered to {batch_id}")
+            continue
+        chosen[offering] = code
+        for day, start, end, core_code in batch["core"].get(str(offering), []):
+            problems.append(
+                f"{code} clashes with {core_code} on {day} "
+                f"{format_minutes(start)}-{format_minutes(end)}"
+            )
+
+    batch_id = batch_id.lower()
+    for a, b, day, start, end, batch_set in phase["pairs"]:
+        if a in chosen and b in chosen and batch_id in phase["batch_sets"][batch_set]:
+            problems.append(
+                f"{chosen[a]} clashes with {chosen[b]} on {day} "
+                f"{format_minutes(start)}-{format_minutes(end)}"
+            )
+
+    return problems
+
+
+def generate_conflicts(classes: dict, path: str = CONFLICTS) -> dict:
+    conflicts = build_conflicts(classes)
+    build_state.write_if_changed(
+        path, json.dumps(conflicts, separators=(",", ":")).encode()
+    )
+    return conflicts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="elective clash matrix")
+    parser.add_argument(
+        "--check",
+        nargs=2,
+        metavar=("PHASE", "BATCH"),
+        help="check the basket of CODES, e.g. --check btech-128_sem5_phase1 F7 26B12CS312",
+    )
+    parser.add_argument("codes", nargs="*", help="elective subject codes for --check")
+    args = parser.parse_args()
+
+    if args.check:
+        with open(CONFLICTS, "r") as f:
+            conflicts = json.load(f)
+        elective_key, batch_id = args.check
+        problems = check_basket(conflicts, elective_key, batch_id, args.codes)
+        print("\n".join(problems) if problems else f"fits {batch_id}")
+        raise SystemExit(1 if problems else 0)
+
+    with open("classes.json", "r") as f:
+        classes = json.load(f)
+    conflicts = generate_conflicts(classes)
+    print(f"{CONFLICTS} generated for {len(conflicts['phases'])} phases")
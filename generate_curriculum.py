@@ -1,7 +1,9 @@
 from typing import Dict, List, Callable, Optional
+import functools
 import json
 
 PATH = "./raw/electives/curriculum{year}.pdf"
+CURRICULUM = "curriculum.json"
 YEARS = [2018, 2024]
 
 def generate_electives() -> Dict[int, Dict[int, List[str]]]:
@@ -282,18 +284,63 @@ def generate_courses() -> Dict[str, str]:
     ]
     curr = {}
     for courses in courses_years:
-        for k, v in courses.items():
+        curr.update(courses)
+
+    return curr
+
+
+class CourseIndex:
+    """Course names by full code, partial codes (15B19CI891 -> B19CI891,
+    19CI891) resolve through an index on the trailing code"""
+
+    def __init__(self, courses: Dict[str, str]):
+        self.courses = courses
+        # later curriculum years win on a shared partial code
+        self.order = {code: i for i, code in enumerate(courses)}
+        self.tails: Dict[str, List[str]] = {}
+        for code in courses:
+            self.tails.setdefault(code[3:], []).append(code)
+
+    def lookup(self, code: str) -> Optional[str]:
+        code = code.strip().upper()
+        name = self.courses.get(code)
+        if name is not None:
+            return name
+
+        # 19CI891 is the trailing code itself, B19CI891 carries one more char
+        matches = [k for k in self.tails.get(code, []) if k[3:] == code]
+        matches += [k for k in self.tails.get(code[1:], []) if k[2:] == code]
+        if not matches:
+            return None
+        return self.courses[max(matches, key=self.order.__getitem__)]
+
+    def expanded(self) -> Dict[str, str]:
+        """Every code also under its partial forms, the map jiit_tt_parser's
+        parse_events expects in place of the compact courses"""
+        curr = {}
+        for k, v in self.courses.items():
             # 15B19CI891 B19CI891 19CI891
             curr.update({k: v, k[2:]: v, k[3:]: v})
 
-    return curr
+        return curr
+
+
+@functools.lru_cache(maxsize=None)
+def load_course_index(path: str = CURRICULUM) -> CourseIndex:
+    """The index of curriculum.json, loaded once per process"""
+    with open(path, "r") as f:
+        return CourseIndex(json.load(f)["courses"])
 
 
 def curriculum():
-    return {"electives": generate_electives(), "courses": generate_courses()}
+    return {
+        "electives": generate_electives(),
+        # full codes only, partial ones resolve through CourseIndex
+        "courses": generate_courses(),
+    }
 
 
 if __name__ == "__main__":
     e = curriculum()
-    with open("curriculum.json", "w+") as f:
+    with open(CURRICULUM, "w+") as f:
         json.dump(e, f)
@@ -0,0 +1,168 @@
+"""
+per-version delta feeds
+compares the classes of this build with the previous build (kept in
+./.cache/previous with its cacheVersion) and writes, for clients still holding the previous
+cacheVersion:
+  ./deltas/{previous cacheVersion}/index.json        changed/added/removed keys
+  ./deltas/{previous cacheVersion}/{batch key}.json  added/removed/changed events
+  ./deltas/{previous cacheVersion}/electives/{course_id}_{sem_id}_{phase_id}.json
+a client on version N fetches deltas/N/index.json and follows the chain to the
+latest version, or refetches everything when the index is missing.
+"""
+
+import json
+import os
+import shutil
+from typing import Dict, List, Tuple
+
+import build_state
+
+DELTAS = "deltas"
+PREVIOUS_DIR = os.path.join(build_state.CACHE_DIR, "previous")
+PREVIOUS_CLASSES = os.path.join(PREVIOUS_DIR, "classes.json")
+PREVIOUS_VERSION = os.path.join(PREVIOUS_DIR, "cacheVersion")
+
+# number of old versions that keep a delta feed
+KEEP_VERSIONS = 10
+
+EventKey = Tuple[str, str, str, str, int]
+
+
+def keyed_events(events: Dict[str, List[dict]]) -> Dict[EventKey, dict]:
+    """Key every event on (day, start, subjectcode, type, occurrence)"""
+    keyed = {}
+    for day, day_events in events.items():
+        seen: Dict[tuple, int] = {}
+        for ev in day_events:
+            ident = (day, ev["start"], ev["subjectcode"], ev["type"])
+            n = seen.get(ident, 0)
+            seen[ident] = n + 1
+            keyed[(*ident, n)] = ev
+
+    return keyed
+
+
+def diff_events(old: Dict[EventKey, dict], new: Dict[EventKey, dict]) -> dict:
+    """Linear diff of two keyed event maps"""
+    delta: Dict[str, list] = {"added": [], "removed": [], "changed": []}
+    for key, ev in new.items():
+        before = old.get(key)
+        if before is None:
+            delta["added"].append(ev)
+        elif before != ev:
+            delta["changed"].append({"before": before, "after": ev})
+
+    delta["removed"] = [ev for key, ev in old.items() if key not in new]
+    return delta
+
+
+def diff_electives(old: List[dict], new: List[dict]) -> dict:
+    def by_day(electives: List[dict]) -> Dict[str, List[dict]]:
+        days: Dict[str, List[dict]] = {}
+        for ev in electives:
+            days.setdefault(ev["day"], []).append(ev)
+        return days
+
+    return diff_events(keyed_events(by_day(old)), keyed_events(by_day(new)))
+
+
+def is_empty(delta: dict) -> bool:
+    return not (delta["added"] or delta["removed"] or delta["changed"])
+
+
+def load_previous() -> Tuple[dict, str] | None:
+    """classes and cacheVersion of the previous build"""
+    try:
+        with open(PREVIOUS_CLASSES, "r") as f:
+            classes = json.load(f)
+        with open(PREVIOUS_VERSION, "r") as f:
+            return classes, f.read().strip()
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def save_previous(classes: dict, cache_version: str) -> None:
+    os.makedirs(PREVIOUS_DIR, exist_ok=True)
+    with open(PREVIOUS_CLASSES, "w+") as f:
+        json.dump(classes, f)
+    with open(PREVIOUS_VERSION, "w+") as f:
+        f.write(cache_version)
+
+
+def prune_deltas(keep: int = KEEP_VERSIONS) -> None:
+    if not os.path.isdir(DELTAS):
+        return
+
+    versions = sorted(
+        (entry for entry in os.scandir(DELTAS) if entry.is_dir()),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in versions[:-keep]:
+        shutil.rmtree(entry.path)
+
+
+def generate_deltas(classes: dict, cache_version: str) -> dict | None:
+    """Write the delta feed from the previous build to this one,
+    returns its index (None without a previous build or version change)"""
+    loaded = load_previous()
+    save_previous(classes, cache_version)
+    if loaded is None:
+        return None
+
+    previous, previous_version = loaded
+    if previous_version == cache_version:
+        return None
+
+    out_dir = os.path.join(DELTAS, previous_version)
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(os.path.join(out_dir, "electives"))
+
+    index = {
+        "from": previous_version,
+        "to": cache_version,
+        "changed": [],
+        "added": [],
+        "removed": [],
+        "electives": [],
+    }
+
+    def dump(path: str, data: dict):
+        with open(path, "w+") as f:
+            json.dump(data, f)
+
+    for key, data in classes.items():
+        if key == "electives":
+            continue
+        if key not in previous:
+            index["added"].append(key)
+            continue
+
+        delta = diff_events(
+            keyed_events(previous[key]["classes"]), keyed_events(data["classes"])
+        )
+        if not is_empty(delta):
+            index["changed"].append(key)
+            dump(
+                os.path.join(out_dir, f"{key}.json"),
+                {"from": previous_version, "to": cache_version, **delta},
+            )
+
+    index["removed"] = [
+        key for key in previous if key != "electives" and key not in classes
+    ]
+
+    previous_electives = previous.get("electives", {})
+    for key, electives in classes["electives"].items():
+        delta = diff_electives(previous_electives.get(key, []), electives)
+        if not is_empty(delta):
+            index["electives"].append(key)
+            dump(
+                os.path.join(out_dir, "electives", f"{key}.json"),
+                {"from": previous_version, "to": cache_version, **delta},
+            )
+
+    dump(os.path.join(out_dir, "index.json"), index)
+    prune_deltas()
+
+    return index
@@ -0,0 +1,238 @@
+"""
+faculty reverse index
+inverts every event of classes.json into per-teacher timetables, in one pass:
+  ./faculty/index.json                  {campus: {abbr: name}}
+  ./faculty/{campus}/{abbr}.json        the teacher's week
+  ./ical/faculty/{campus}/{abbr}.ics    the same as a calendar
+teachers are resolved against faculty_{campus}.json (campus being the
+course_id suffix, 62 or 128), abbreviations are only unique per campus.
+an event shared by several batches (or listed again under electives) is
+one entry carrying the union of its batches.
+"""
+
+import datetime
+import json
+import os
+import re
+from typing import Dict, Tuple
+
+import build_state
+from generate_icalendar import (calendar_lines, event_date, join_lines,
+                                now_stamp, stable_stamp, utc_stamp,
+                                vevent_lines)
+
+FACULTY_DIR = "faculty"
+FACULTY_ICAL_DIR = os.path.join("ical", "faculty")
+
+
+def slug(value: str) -> str:
+    """file name safe id, "New Faculty CS 11" -> "NEW-FACULTY-CS-11" """
+    return re.sub(r"[^A-Za-z0-9]+", "-", value).strip("-").upper()
+
+
+class FacultyResolver:
+    """name or abbreviation -> (id, name) within a campus"""
+
+    def __init__(self):
+        self.maps: Dict[str, Dict[str, str]] = {}
+        self.reverse: Dict[str, Dict[str, str]] = {}
+
+    def load(self, campus: str) -> None:
+        path = f"faculty_{campus}.json"
+        faculty = {}
+        if os.path.isfile(path):
+            with open(path, "r") as f:
+                faculty = json.load(f)
+
+        reverse: Dict[str, str] = {}
+        # a name listed under several abbreviations keeps the first one
+        for abbr, name in sorted(faculty.items()):
+            reverse.setdefault(name, abbr)
+        self.maps[campus] = faculty
+        self.reverse[campus] = reverse
+
+    def __call__(self, campus: str, teacher: str) -> Tuple[str, str]:
+        if campus not in self.maps:
+            self.load(campus)
+
+        if teacher in self.maps[campus]:
+            return slug(teacher), self.maps[campus][teacher]
+        if teacher in self.reverse[campus]:
+            return slug(self.reverse[campus][teacher]), teacher
+        # unmapped abbreviations and full names, e.g. "New Faculty CS 11"
+        return slug(teacher), teacher
+
+
+def campus_of(course_id: str) -> str:
+    return course_id.rsplit("-", 1)[-1]
+
+
+def build_faculty_index(classes: dict) -> Dict[Tuple[str, str], dict]:
+    """{(campus, abbr): {"id", "name", "campus", "events"}},
+    every event once with "phase" (course_sem_phase) and the merged batches"""
+    resolve = FacultyResolver()
+    faculty: Dict[Tuple[str, str], dict] = {}
+    events: Dict[tuple, dict] = {}
+    # batches of every entry, as an ordered set until all events are in
+    batches: Dict[tuple, Dict[str, None]] = {}
+
+    def add(ev: dict, elective_key: str):
+        campus = campus_of(elective_key.split("_", 1)[0])
+        for teacher in ev["teacher"].split(", "):
+            teacher = teacher.strip()
+            if not teacher:
+                continue
+
+            abbr, name = resolve(campus, teacher)
+            key = (
+                campus,
+                abbr,
+                elective_key,
+                ev["day"].lower(),
+                ev["start"],
+                ev["end"],
+                ev["subjectcode"],
+                ev["type"],
+                ev["venue"],
+            )
+            entry = events.get(key)
+            if entry is None:
+                if (campus, abbr) not in faculty:
+                    faculty[(campus, abbr)] = {
+                        "id": abbr,
+                        "name": name,
+                        "campus": campus,
+                        "events": [],
+                    }
+                entry = {**ev, "day": ev["day"].lower(), "phase": elective_key}
+                events[key] = entry
+                batches[key] = {}
+                faculty[(campus, abbr)]["events"].append(entry)
+            batches[key].update(dict.fromkeys(ev["batches"]))
+
+    for class_batch_key, data in classes.items():
+        if class_batch_key == "electives":
+            continue
+        elective_key = class_batch_key.rsplit("_", 1)[0]
+        for day_events in data["classes"].values():
+            for ev in day_events:
+                add(ev, elective_key)
+
+    for elective_key, electives in classes["electives"].items():
+        for ev in electives:
+            add(ev, elective_key)
+
+    for key, entry in events.items():
+        entry["batches"] = list(batches[key])
+
+    return faculty
+
+
+def serialize_faculty_icalendar(
+    teacher: dict, stamp: datetime.datetime, term: datetime.date | None = None
+) -> bytes:
+    dtstamp = utc_stamp(stamp)
+    lines = calendar_lines(
+        f"-//JIIT Planner//Faculty {teacher['campus']} {teacher['id']}//EN",
+        f"JIIT {teacher['name']} Timetable",
+        stamp,
+    )
+    for ev in teacher["events"]:
+        date = event_date(stamp, ev["day"], term)
+        if date is None:
+            continue
+        uid = "_".join(
+            (
+                "faculty",
+                teacher["campus"],
+                teacher["id"],
+                ev["phase"],
+                ev["day"],
+                ev["start"],
+                ev["subjectcode"],
+                ev["type"],
+                ev["venue"],
+            )
+        )
+        lines += vevent_lines(ev, uid, date, dtstamp)
+
+    lines.append("END:VCALENDAR")
+    return join_lines(lines)
+
+
+def remove_stale(root: str, written: set) -> int:
+    removed = 0
+    for dirpath, _, files in os.walk(root):
+        for file in files:
+            path = os.path.normpath(os.path.join(dirpath, file))
+            if path.endswith((".json", ".ics")) and path not in written:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def generate_faculty(
+    classes: dict, stable: bool = False, term: datetime.date | None = None
+) -> int:
+    """Write the faculty index, json and ics, returns the number of teachers
+    events start on or after term, with stable=True (which needs a term)
+    calendars are stamped with stable_stamp(term), like
+    generate_icalendars(stable=True), so unchanged ones keep their bytes"""
+    if stable and term is None:
+        raise ValueError("stable calendars need a term start")
+
+    faculty = build_faculty_index(classes)
+    if stable:
+        stamp = stable_stamp(term)
+    else:
+        stamp = now_stamp()
+    written = set()
+    index: Dict[str, Dict[str, str]] = {}
+
+    for (campus, abbr), teacher in sorted(faculty.items()):
+        index.setdefault(campus, {})[abbr] = teacher["name"]
+        json_path = os.path.join(FACULTY_DIR, campus, f"{abbr}.json")
+        ics_path = os.path.join(FACULTY_ICAL_DIR, campus, f"{abbr}.ics")
+        os.makedirs(os.path.dirname(json_path), exist_ok=True)
+        os.makedirs(os.path.dirname(ics_path), exist_ok=True)
+
+        build_state.write_if_changed(json_path, json.dumps(teacher).encode())
+        build_state.write_if_changed(
+            ics_path, serialize_faculty_icalendar(teacher, stamp, term)
+        )
+        written.update((os.path.normpath(json_path), os.path.normpath(ics_path)))
+
+    os.makedirs(FACULTY_DIR, exist_ok=True)
+    index_path = os.path.join(FACULTY_DIR, "index.json")
+    build_state.write_if_changed(index_path, json.dumps(index).encode())
+    written.add(os.path.normpath(index_path))
+    removed = remove_stale(FACULTY_DIR, written) + remove_stale(FACULTY_ICAL_DIR, written)
+
+    print(f"{len(faculty)} faculty timetables, {removed} stale removed")
+    return len(faculty)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="per-faculty timetables from classes.json")
+    parser.add_argument(
+        "--stable",
+        action="store_true",
+        help="stamp calendars with the term start (reproducible output)",
+    )
+    parser.add_argument(
+        "--term-start",
+        type=datetime.date.fromisoformat,
+        help="first day of classes (YYYY-MM-DD), events start on or after it, "
+        "required by --stable",
+    )
+    args = parser.parse_args()
+
+    if args.stable and args.term_start is None:
+        parser.error("--stable needs --term-start")
+
+    with open("classes.json", "r") as f:
+        classes = json.load(f)
+
+    generate_faculty(classes, args.stable, args.term_start)
@@ -6,22 +6,66 @@ files are genrated as - ./ical/{course_id}/{sem_id}/{phase_id}/{batch}.ics
 
 import json
 import datetime
+import functools
+import hashlib
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Dict, List
 from icalendar import Calendar, Event as CalEvent, Timezone, TimezoneStandard
 import pytz
 
+import build_state
 
+STAMP_FORMAT = "%Y%m%dT%H%M%S"
+IST_OFFSET = datetime.timedelta(hours=5, minutes=30)
+WEEKDAYS = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6
+}
 
-def get_next_weekday(start_date: datetime.date, weekday: int):
+
+
+def now_stamp() -> datetime.datetime:
+    """Current Asia/Kolkata time, naive and to the second, the stamp of
+    calendars that are not reproducible"""
+    return datetime.datetime.now(pytz.timezone('Asia/Kolkata')).replace(tzinfo=None, microsecond=0)
+
+
+def stable_stamp(term: datetime.date) -> datetime.datetime:
+    """Stamp of reproducible calendars, midnight of the term start, so the
+    bytes of a calendar only depend on its events and the term"""
+    return datetime.datetime.combine(term, datetime.time())
+
+
+def get_next_weekday(start_date: datetime.date, weekday: int, inclusive: bool = False):
     days_ahead = weekday - start_date.weekday()
-    if days_ahead <= 0:  # Target day already happened this week
+    if days_ahead < 0 or (days_ahead == 0 and not inclusive):  # Target day already happened this week
         days_ahead += 7
     return start_date + datetime.timedelta(days_ahead)
 
 
-def generate_icalendar_for_batch(events_data: dict, course_id: str, sem_id: str, phase_id: str, batch_id: str) -> Calendar:
-    """Generate icalender for a specific batch"""
+def first_date(stamp: datetime.datetime, weekday: int, term: datetime.date | None = None) -> datetime.date:
+    """First class on weekday, on or after the term start when there is one,
+    otherwise the first one after the stamp"""
+    if term is not None:
+        return get_next_weekday(term, weekday, inclusive=True)
+    return get_next_weekday(stamp.date(), weekday)
+
+
+@functools.lru_cache(maxsize=None)
+def parse_time(value: str) -> datetime.time:
+    return datetime.datetime.strptime(value, "%I:%M %p").time()
+
+
+def generate_icalendar_for_batch(events_data: dict, course_id: str, sem_id: str, phase_id: str, batch_id: str, stamp: datetime.datetime | None = None, term: datetime.date | None = None) -> Calendar:
+    """Generate icalender for a specific batch
+    stamp (naive, Asia/Kolkata) replaces the current time in DTSTAMP and the
+    VTIMEZONE DTSTART, term (the first day of classes) the start reference,
+    together they make the output reproducible"""
+    timezone = pytz.timezone('Asia/Kolkata')
+    if stamp is None:
+        stamp = now_stamp()
+
     cal = Calendar()
     cal.add('prodid', f'-//JIIT Planner//Timetable {course_id} {sem_id} {phase_id} {batch_id}//EN')
     cal.add('version', '2.0')
@@ -37,24 +81,15 @@ def generate_icalendar_for_batch(events_data: dict, course_id: str, sem_id: str,
     # Standard time component for Asia/Kolkata (IST is UTC+5:30 all year)
     tz_standard = TimezoneStandard()
     tz_standard.add('tzname', 'IST')
-    tz_standard.add('dtstart', datetime.datetime.now())
+    tz_standard.add('dtstart', stamp)
     tz_standard.add('tzoffsetfrom', datetime.timedelta(hours=5, minutes=30))
     tz_standard.add('tzoffsetto', datetime.timedelta(hours=5, minutes=30))
     
     tz.add_component(tz_standard)
     cal.add_component(tz)
     
-    weekdays = {
-        'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
-        'friday': 4, 'saturday': 5, 'sunday': 6
-    }
-    
-    # Use current date as start reference
-    start_date = datetime.date.today()
-    timezone = pytz.timezone('Asia/Kolkata')
-    
     # Creation timestamp for all events
-    creation_time = datetime.datetime.now(timezone)
+    creation_time = timezone.localize(stamp)
     
     classes = events_data.get('classes', {})
     
@@ -63,18 +98,18 @@ def generate_icalendar_for_batch(events_data: dict, course_id: str, sem_id: str,
             continue
             
         day_lower = day_name.lower()
-        if day_lower not in weekdays:
+        if day_lower not in WEEKDAYS:
             continue
             
-        weekday = weekdays[day_lower]
-        event_date = get_next_weekday(start_date, weekday)
+        weekday = WEEKDAYS[day_lower]
+        event_date = first_date(stamp, weekday, term)
         
         for event_info in day_events:
             # Create calendar event
             cal_event = CalEvent()
             
-            start_time = datetime.datetime.strptime(event_info['start'], "%I:%M %p").time()
-            end_time = datetime.datetime.strptime(event_info['end'], "%I:%M %p").time()
+            start_time = parse_time(event_info['start'])
+            end_time = parse_time(event_info['end'])
 
             
             start_datetime = timezone.localize(
@@ -116,8 +151,199 @@ def generate_icalendar_for_batch(events_data: dict, course_id: str, sem_id: str,
     return cal
 
 
-def generate_icalendars(classes: dict) -> None:
+def escape_text(value: str) -> str:
+    """RFC 5545 TEXT escaping, same as icalendar's vText"""
+    return (
+        value.replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def fold_line(line: str, limit: int = 75) -> str:
+    """Fold a content line to at most `limit` octets (RFC 5545 3.1), never
+    inside a UTF-8 sequence. icalendar may fold the same line at other
+    points (e.g. around \\n escapes), both unfold to the same content"""
+    if line.isascii():
+        return '\r\n '.join(line[i:i + limit - 1] for i in range(0, len(line), limit - 1))
+
+    chars = []
+    byte_count = 0
+    for char in line:
+        char_len = len(char.encode('utf-8'))
+        byte_count += char_len
+        if byte_count >= limit:
+            chars.append('\r\n ')
+            byte_count = char_len
+        chars.append(char)
+    return ''.join(chars)
+
+
+def calendar_lines(prodid: str, calname: str, stamp: datetime.datetime) -> List[str]:
+    """VCALENDAR header and VTIMEZONE content lines, up to the first VEVENT"""
+    return [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:' + escape_text(prodid),
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        'X-WR-CALNAME:' + escape_text(calname),
+        'BEGIN:VTIMEZONE',
+        'TZID:Asia/Kolkata',
+        'X-LIC-LOCATION:Asia/Kolkata',
+        'BEGIN:STANDARD',
+        'DTSTART:' + stamp.strftime(STAMP_FORMAT),
+        'TZNAME:IST',
+        'TZOFFSETFROM:+0530',
+        'TZOFFSETTO:+0530',
+        'END:STANDARD',
+        'END:VTIMEZONE',
+    ]
+
+
+def vevent_lines(event_info: dict, uid: str, event_date: str, utc_stamp: str) -> List[str]:
+    """Content lines of one weekly VEVENT, event_date as YYYYMMDD"""
+    start_time = parse_time(event_info['start']).strftime('T%H%M%S')
+    end_time = parse_time(event_info['end']).strftime('T%H%M%S')
+
+    description = (
+        f"Subject: {event_info['subject']}\n"
+        f"Subject Code: {event_info['subjectcode']}\n"
+        f"Teacher: {event_info['teacher']}\n"
+        f"Venue: {event_info['venue']}\n"
+        f"Type: {event_info['type']}\n"
+        f"Batches: {', '.join(event_info['batches'])}"
+    )
+
+    return [
+        'BEGIN:VEVENT',
+        'SUMMARY:' + escape_text(f"{event_info['subject']} ({event_info['subjectcode']})"),
+        f'DTSTART;TZID=Asia/Kolkata:{event_date}{start_time}',
+        f'DTEND;TZID=Asia/Kolkata:{event_date}{end_time}',
+        'DTSTAMP:' + utc_stamp,
+        'UID:' + escape_text(uid),
+        'RRULE:FREQ=WEEKLY;COUNT=16',
+        'DESCRIPTION:' + escape_text(description),
+        'LOCATION:' + escape_text(event_info['venue']),
+        'X-GOOGLE-DEFAULT-REMINDERS:false',
+        'END:VEVENT',
+    ]
+
+
+def event_date(stamp: datetime.datetime, day_name: str, term: datetime.date | None = None) -> str | None:
+    """YYYYMMDD of the first day_name class (see first_date), None for unknown days"""
+    weekday = WEEKDAYS.get(day_name.lower())
+    if weekday is None:
+        return None
+    return first_date(stamp, weekday, term).strftime('%Y%m%d')
+
+
+def utc_stamp(stamp: datetime.datetime) -> str:
+    return (stamp - IST_OFFSET).strftime(STAMP_FORMAT) + 'Z'
+
+
+def join_lines(lines: List[str]) -> bytes:
+    return ''.join(fold_line(line) + '\r\n' for line in lines).encode('utf-8')
+
+
+def serialize_icalendar_for_batch(events_data: dict, course_id: str, sem_id: str, phase_id: str, batch_id: str, stamp: datetime.datetime | None = None, term: datetime.date | None = None) -> bytes:
+    """Fast equivalent of generate_icalendar_for_batch(...).to_ical()
+    writes the content lines directly instead of building icalendar components"""
+    if stamp is None:
+        stamp = now_stamp()
+
+    dtstamp = utc_stamp(stamp)
+    lines = calendar_lines(
+        f'-//JIIT Planner//Timetable {course_id} {sem_id} {phase_id} {batch_id}//EN',
+        f'JIIT {course_id.upper()} {sem_id.upper()} {phase_id.upper()} {batch_id.upper()} Timetable',
+        stamp,
+    )
+
+    for day_name, day_events in events_data.get('classes', {}).items():
+        if not day_events:
+            continue
+
+        date = event_date(stamp, day_name, term)
+        if date is None:
+            continue
+
+        for event_info in day_events:
+            uid = f"{course_id}_{sem_id}_{phase_id}_{batch_id}_{day_name}_{event_info['start']}_{event_info['subjectcode']}"
+            lines += vevent_lines(event_info, uid, date, dtstamp)
+
+    lines.append('END:VCALENDAR')
+    return join_lines(lines)
+
+
+def check_serializer_parity(classes: dict, stamp: datetime.datetime | None = None, term: datetime.date | None = None) -> List[str]:
+    """Parse the output of both serializers with icalendar and compare them
+    component by component, returns the keys of the batches that differ"""
+    if stamp is None:
+        stamp = now_stamp()
+
+    def to_ical(value):
+        if isinstance(value, list):
+            return [v.to_ical() for v in value]
+        return value.to_ical()
+
+    def components(data: bytes):
+        return [
+            (component.name, sorted((name, to_ical(value)) for name, value in component.items()))
+            for component in Calendar.from_ical(data).walk()
+        ]
+
+    mismatched = []
+    for class_batch_key, events_data in classes.items():
+        parts = class_batch_key.split('_')
+        if len(parts) < 4:
+            continue
+
+        reference = generate_icalendar_for_batch(events_data, *parts[:4], stamp, term).to_ical()
+        fast = serialize_icalendar_for_batch(events_data, *parts[:4], stamp, term)
+        if components(reference) != components(fast):
+            mismatched.append(class_batch_key)
+
+    return mismatched
+
+
+def events_hash(events_data: dict) -> str:
+    classes = events_data.get('classes', {})
+    return hashlib.sha256(json.dumps(classes, sort_keys=True).encode()).hexdigest()
+
+
+def build_icalendar(task: tuple) -> bytes:
+    """Calendar bytes for one (events_data, course_id, sem_id, phase_id, batch_id, stamp, term, fast) task"""
+    *args, fast = task
+    if fast:
+        return serialize_icalendar_for_batch(*args)
+    return generate_icalendar_for_batch(*args).to_ical()
+
+
+def generate_icalendars(classes: dict, stable: bool = False, fast: bool = False, jobs: int = 1, term: datetime.date | None = None) -> None:
+    """Write ./ical/{course_id}/{sem_id}/{phase_id}/{batch}.ics for every batch
+    term is the first day of classes, every weekly event starts on or after it,
+    without one they start the week after the run
+    with stable=True (which needs a term) every calendar is stamped with
+    stable_stamp(term) instead of the time of the run, so unchanged calendars
+    keep identical bytes on any checkout, and calendars whose events did not
+    change since the last run are not rebuilt at all
+    with fast=True calendars are written by serialize_icalendar_for_batch
+    with jobs > 1 calendars are built in worker processes and written from a thread pool"""
+    if stable and term is None:
+        raise ValueError("stable calendars need a term start")
+
     os.makedirs("ical", exist_ok=True)
+    state = build_state.load_state() if stable else None
+    if stable:
+        run_stamp = stable_stamp(term)
+    else:
+        run_stamp = now_stamp()
+    written = skipped = 0
+    ical_dirs = set()
+    filenames = []
+    tasks = []
     
     for class_batch_key, events_data in classes.items():
         parts = class_batch_key.split('_')
@@ -128,18 +354,41 @@ def generate_icalendars(classes: dict) -> None:
             batch_id = parts[3]
             
             ical_dir = f"ical/{course_id}/{sem_id}/{phase_id}"  #Access like (url)/ical/{course_id}/{sem_id}/{phase_id}/{batch}.ics"
-            os.makedirs(ical_dir, exist_ok=True)
-            
-            cal = generate_icalendar_for_batch(events_data, course_id, sem_id, phase_id, batch_id)
-            
             ical_filename = f"{ical_dir}/{batch_id}.ics"
-            with open(ical_filename, 'wb') as f:
-                f.write(cal.to_ical())
             
-            print(f"Generated icalender: {ical_filename}")
+            if state is not None:
+                # the state only saves rebuilding, the bytes never depend on it
+                entry = {"hash": events_hash(events_data), "stamp": run_stamp.strftime(STAMP_FORMAT)}
+                if state["ical"].get(ical_filename) == entry and os.path.isfile(ical_filename):
+                    skipped += 1
+                    continue
+                state["ical"][ical_filename] = entry
+            
+            ical_dirs.add(ical_dir)
+            filenames.append(ical_filename)
+            tasks.append((events_data, course_id, sem_id, phase_id, batch_id, run_stamp, term, fast))
+    
+    for ical_dir in ical_dirs:
+        os.makedirs(ical_dir, exist_ok=True)
+    
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            calendars = list(pool.map(build_icalendar, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            changed = list(pool.map(build_state.write_if_changed, filenames, calendars))
+    else:
+        changed = [build_state.write_if_changed(f, build_icalendar(t)) for f, t in zip(filenames, tasks)]
+    
+    written = sum(changed)
+    skipped += len(changed) - written
+    
+    if state is not None:
+        build_state.save_state(state)
+    
+    print(f"{written} icalenders written, {skipped} unchanged")
 
 
-def generate_icalendars_json(json_file_path: str = "classes.json"):
+def generate_icalendars_json(json_file_path: str = "classes.json", stable: bool = False, fast: bool = False, jobs: int = 1, term: datetime.date | None = None):
     """Genrate icalender files from json files"""
     try:
         # Load classes data
@@ -147,7 +396,7 @@ def generate_icalendars_json(json_file_path: str = "classes.json"):
             classes = json.load(f)
         
         # Generate icalender files
-        generate_icalendars(classes)
+        generate_icalendars(classes, stable, fast, jobs, term)
         
         print(f"icalender files generated from {json_file_path}")
         
@@ -159,7 +408,28 @@ def generate_icalendars_json(json_file_path: str = "classes.json"):
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="generate icalender files from classes.json")
+    parser.add_argument("--stable", action="store_true", help="reproducible calendars stamped with the term start, only rewritten when their events change")
+    parser.add_argument("--term-start", type=datetime.date.fromisoformat, help="first day of classes (YYYY-MM-DD), events start on or after it, required by --stable")
+    parser.add_argument("--fast", action="store_true", help="use the template serializer instead of icalendar components")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes used to build calendars")
+    parser.add_argument("--check", action="store_true", help="compare both serializers on classes.json and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        with open("classes.json", 'r') as f:
+            mismatched = check_serializer_parity(json.load(f))
+        print(f"{len(mismatched)} calendars differ between serializers")
+        for class_batch_key in mismatched:
+            print(f"  {class_batch_key}")
+        raise SystemExit(1 if mismatched else 0)
+
+    if args.stable and args.term_start is None:
+        parser.error("--stable needs --term-start")
+
     if os.path.exists("classes.json"):
-        generate_icalendars_json("classes.json")
+        generate_icalendars_json("classes.json", args.stable, args.fast, args.jobs, args.term_start)
     else:
         print("classes.json not found --> Please run generate_cache.py first")
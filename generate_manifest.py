@@ -0,0 +1,38 @@
+"""
+manifest.json: every published artifact with its sha256 and size
+{"cacheVersion": "...", "files": {"classes.json": {"sha256": "...", "size": 123}, ...}}
+clients and CDN sync tools compare it with their copy and only fetch the
+files whose hash changed.
+"""
+
+import json
+import os
+
+import build_state
+from generate_compressed import published_files
+
+MANIFEST = "manifest.json"
+
+
+def generate_manifest(cache_version: str, path: str = MANIFEST) -> dict:
+    files = {}
+    for file in published_files():
+        if file == path:
+            continue
+        files[file.replace(os.sep, "/")] = {
+            "sha256": build_state.file_hash(file),
+            "size": os.path.getsize(file),
+        }
+
+    manifest = {"cacheVersion": cache_version, "files": files}
+    build_state.write_if_changed(path, json.dumps(manifest, indent=1).encode())
+
+    return manifest
+
+
+if __name__ == "__main__":
+    with open("metadata.json", "r") as f:
+        metadata = json.load(f)
+
+    manifest = generate_manifest(metadata["cacheVersion"])
+    print(f"{MANIFEST} lists {len(manifest['files'])} files")
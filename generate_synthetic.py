@@ -0,0 +1,302 @@
+"""
+synthetic timetable workbooks for scale testing
+writes a raw/time_tables shaped tree
+    {out}/Synthetic {n} (syn{n}-62)/{sem}/{phase}.xlsx
+laid out like the 62 campus sheets: title in row 1, time slots in row 2,
+day names in column A merged over each day block and one event per cell
+(`LA1,A2(15B11CI111)-G1/TAJ`, `TA3(...)`, labs `PB1,B2(...)` over two slots).
+subjects come from curriculum.json, faculty abbreviations from
+faculty_62.json and elective codes from the electives already in
+classes.json, so the sheets go through jiit_tt_parser like the real ones.
+the same --seed always writes the same workbooks.
+
+    python generate_synthetic.py --courses 10 --batches 60 -o /tmp/tt
+    python benchmark.py --time-tables /tmp/tt
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+from typing import Dict, List, Tuple
+
+from openpyxl import Workbook
+
+OUTPUT = os.path.join("synthetic", "time_tables")
+FACULTY = "faculty_62.json"
+CURRICULUM = "curriculum.json"
+CLASSES = "classes.json"
+
+DAYS = ["MON", "TUE", "WED", "THU", "FRI", "SAT"]
+SLOTS = [
+    "9-9.50",
+    "10-10.50",
+    "11-11.50",
+    "12-12.50",
+    "1-1.50",
+    "2-2.50",
+    "3-3.50",
+    "4-4.50",
+]
+LUNCH_SLOT = 4
+BATCH_PREFIXES = ["A", "B", "C", "D", "G"]
+ROMAN = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII"]
+
+LECTURE_ROOMS = [f"G{i}" for i in range(1, 10)] + [f"FF{i}" for i in range(1, 9)]
+TUTORIAL_ROOMS = [f"TS{i}" for i in range(1, 21)]
+LABS = [f"CL{i:02}" for i in range(1, 21)]
+# used when classes.json has no 62 campus electives
+DEFAULT_ELECTIVES = [f"16CS3{i}" for i in range(11, 21)]
+
+
+def load_pools() -> Tuple[List[str], Dict[str, str], List[str]]:
+    """(faculty abbreviations, curriculum codes, elective codes)"""
+    with open(FACULTY, "r") as f:
+        faculty = sorted(k for k in json.load(f) if re.fullmatch(r"[A-Z]{2,4}", k))
+
+    with open(CURRICULUM, "r") as f:
+        courses = json.load(f)["courses"]
+    codes = {k: v for k, v in courses.items() if re.fullmatch(r"\d\dB\d\d[A-Z]{2}\d{3}", k)}
+
+    electives = set()
+    if os.path.isfile(CLASSES):
+        with open(CLASSES, "r") as f:
+            for key, evs in json.load(f)["electives"].items():
+                if key.split("_")[0].endswith("-62"):
+                    electives.update(ev["subjectcode"] for ev in evs)
+
+    return faculty, codes, sorted(electives) or DEFAULT_ELECTIVES
+
+
+def semester_subjects(codes: Dict[str, str], sem: int) -> Tuple[List[str], List[str]]:
+    """(lecture codes, lab codes) of the year sem belongs to"""
+    year = str((sem + 1) // 2)
+    same_year = sorted(k for k in codes if k[-3] == year) or sorted(codes)
+    labs = [k for k in same_year if k[4] == "7"]
+    lectures = [k for k in same_year if k[4] != "7"]
+    return lectures or same_year, labs or same_year
+
+
+def make_batches(count: int) -> List[str]:
+    per_prefix = -(-count // len(BATCH_PREFIXES))
+    return [
+        f"{BATCH_PREFIXES[i // per_prefix]}{i % per_prefix + 1}" for i in range(count)
+    ]
+
+
+def cell_text(kind: str, batches: List[str], code: str, venue: str, faculty: str) -> str:
+    return f"{kind}{','.join(batches)}({code})-{venue}/{faculty}"
+
+
+def plan_day(
+    rng: random.Random,
+    batches: List[str],
+    lectures: List[str],
+    labs: List[str],
+    electives: List[str],
+    faculty: List[str],
+    density: float,
+    elective_slot: int | None,
+    elective_subjects: int,
+) -> List[Tuple[int, int, str]]:
+    """Events of one day as (slot, width, text), no batch is booked twice
+    in a slot and every batch sits in roughly `density` of the slots"""
+    busy = set()
+    events = []
+
+    if elective_slot is not None:
+        busy.update((batch, elective_slot) for batch in batches)
+        for code in rng.sample(electives, min(elective_subjects, len(electives))):
+            group = sorted(
+                rng.sample(batches, rng.randint(1, len(batches))),
+                key=batches.index,
+            )
+            events.append(
+                (
+                    elective_slot,
+                    1,
+                    cell_text(
+                        "L", group, code, rng.choice(LECTURE_ROOMS), rng.choice(faculty)
+                    ),
+                )
+            )
+
+    for slot in range(len(SLOTS)):
+        if slot in (LUNCH_SLOT, elective_slot):
+            continue
+
+        free = [b for b in batches if (b, slot) not in busy and rng.random() < density]
+        while free:
+            kind = rng.choices("LTP", weights=(5, 2, 2))[0]
+            next_slot = slot + 1
+            if kind == "P" and (
+                next_slot in (len(SLOTS), LUNCH_SLOT, elective_slot)
+                or (free[0], next_slot) in busy
+            ):
+                kind = "L"
+
+            size = 1 if kind == "T" else min(len(free), rng.randint(2, 3))
+            group, free = free[:size], free[size:]
+            width = 2 if kind == "P" else 1
+            if kind == "P":
+                group = [b for b in group if (b, next_slot) not in busy]
+            busy.update((b, s) for b in group for s in range(slot, slot + width))
+
+            if kind == "P":
+                code, venue = rng.choice(labs), rng.choice(LABS)
+            elif kind == "T":
+                code, venue = rng.choice(lectures), rng.choice(TUTORIAL_ROOMS)
+            else:
+                code, venue = rng.choice(lectures), rng.choice(LECTURE_ROOMS)
+            events.append(
+                (slot, width, cell_text(kind, group, code, venue, rng.choice(faculty)))
+            )
+
+    return events
+
+
+def write_phase(
+    path: str,
+    title: str,
+    days: List[List[Tuple[int, int, str]]],
+) -> int:
+    """Lay the planned days out in a workbook, returns the event count"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.cell(row=1, column=1, value=title)
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(SLOTS) + 1)
+    for i, slot in enumerate(SLOTS):
+        ws.cell(row=2, column=i + 2, value=slot)
+
+    row = 3
+    count = 0
+    for day, events in zip(DAYS, days):
+        # slots taken in each row of the day block, an event goes in the
+        # first row where its slots are free
+        rows: List[set] = []
+        ws.cell(row=row, column=LUNCH_SLOT + 2, value="LUNCH")
+        for slot, width, text in events:
+            offset = 0
+            while offset < len(rows) and any(
+                s in rows[offset] for s in range(slot, slot + width)
+            ):
+                offset += 1
+            if offset == len(rows):
+                rows.append(set())
+            rows[offset].update(range(slot, slot + width))
+
+            ws.cell(row=row + offset, column=slot + 2, value=text)
+            if width > 1:
+                ws.merge_cells(
+                    start_row=row + offset,
+                    start_column=slot + 2,
+                    end_row=row + offset,
+                    end_column=slot + width + 1,
+                )
+            count += 1
+
+        height = max(len(rows), 1)
+        ws.cell(row=row, column=1, value=day)
+        if height > 1:
+            ws.merge_cells(
+                start_row=row, start_column=1, end_row=row + height - 1, end_column=1
+            )
+        row += height
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    wb.save(path)
+    return count
+
+
+def generate_synthetic(
+    out_dir: str = OUTPUT,
+    courses: int = 1,
+    sems: List[int] | None = None,
+    phases: int = 1,
+    batches: int = 20,
+    density: float = 0.6,
+    elective_blocks: int = 3,
+    elective_subjects: int = 4,
+    seed: int = 0,
+) -> int:
+    """Write the synthetic tree, returns the number of events written"""
+    rng = random.Random(seed)
+    faculty, codes, electives = load_pools()
+    batch_names = make_batches(batches)
+    sems = sems or [1, 3, 5]
+
+    total = 0
+    for n in range(1, courses + 1):
+        course_dir = os.path.join(out_dir, f"Synthetic {n} (syn{n}-62)")
+        for sem in sems:
+            lectures, labs = semester_subjects(codes, sem)
+            for phase in range(1, phases + 1):
+                # electives start from the fifth semester like the real sheets
+                blocks = elective_blocks if sem >= 5 else 0
+                elective_days = set(rng.sample(range(len(DAYS)), min(blocks, len(DAYS))))
+                days = [
+                    plan_day(
+                        rng,
+                        batch_names,
+                        lectures,
+                        labs,
+                        electives,
+                        faculty,
+                        density,
+                        rng.choice([s for s in range(len(SLOTS)) if s != LUNCH_SLOT])
+                        if d in elective_days
+                        else None,
+                        elective_subjects,
+                    )
+                    for d in range(len(DAYS))
+                ]
+                title = f"SYNTHETIC {n} {ROMAN[(sem - 1) % len(ROMAN)]} SEMESTER"
+                path = os.path.join(course_dir, str(sem), f"{phase}.xlsx")
+                total += write_phase(path, title, days)
+
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="write seeded synthetic timetable workbooks"
+    )
+    parser.add_argument("-o", "--output", default=OUTPUT, help="output tree")
+    parser.add_argument("--courses", type=int, default=1, help="number of courses")
+    parser.add_argument(
+        "--sems", type=int, nargs="+", default=[1, 3, 5], help="semesters per course"
+    )
+    parser.add_argument("--phases", type=int, default=1, help="phases per semester")
+    parser.add_argument("--batches", type=int, default=20, help="batches per phase")
+    parser.add_argument(
+        "--density",
+        type=float,
+        default=0.6,
+        help="fraction of the slots every batch has a class in",
+    )
+    parser.add_argument(
+        "--elective-blocks",
+        type=int,
+        default=3,
+        help="elective slots per week from the fifth semester",
+    )
+    parser.add_argument(
+        "--elective-subjects", type=int, default=4, help="electives per elective slot"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    count = generate_synthetic(
+        args.output,
+        args.courses,
+        args.sems,
+        args.phases,
+        args.batches,
+        args.density,
+        args.elective_blocks,
+        args.elective_subjects,
+        args.seed,
+    )
+    print(f"{count} synthetic events written to {args.output}")
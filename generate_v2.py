@@ -0,0 +1,220 @@
+"""
+compact (v2) encoding of classes.json
+every phase gets its own string tables (subjects, teachers, venues, batches,
+...), events become integer tuples indexing those tables, identical events
+are stored once and batch schedules / electives refer to events by id.
+decode_classes_v2 is the reference decoder, it rebuilds the v1 structure.
+
+{
+  "version": 2,
+  "phases": {
+    "{course_id}_{sem_id}_{phase_id}": {
+      "subjects": [[subject, subjectcode], ...],
+      "teachers": [...], "venues": [...], "types": [...], "categories": [...],
+      "days": [...], "times": [...],
+      "batches": [...], "batch_sets": [[batch, ...], ...],
+      "events": [[day, start, end, subject, teacher, venue, type, batch_set, category], ...],
+      "electives": [event, ...],
+      "schedules": {batch_id: {day_name: [event, ...]}},
+      "versions": {batch_id: cacheVersion}
+    }
+  }
+}
+category is -1 for regular classes and an index into categories for electives.
+"""
+
+import json
+from typing import Any, Dict, List
+
+import build_state
+
+V2_FILE = "classes.v2.json"
+
+TABLES = (
+    "subjects",
+    "teachers",
+    "venues",
+    "types",
+    "categories",
+    "days",
+    "times",
+    "batches",
+    "batch_sets",
+)
+
+
+class Interner:
+    def __init__(self):
+        self.values: List[Any] = []
+        self.index: Dict[Any, int] = {}
+
+    def __call__(self, value: Any) -> int:
+        key = json.dumps(value)
+        if key not in self.index:
+            self.index[key] = len(self.values)
+            self.values.append(value)
+        return self.index[key]
+
+
+def encode_phase(electives: List[dict], batches: Dict[str, dict]) -> dict:
+    tables = {name: Interner() for name in TABLES}
+    events = Interner()
+
+    def encode_event(ev: dict) -> int:
+        batch_set = tables["batch_sets"](
+            [tables["batches"](batch) for batch in ev["batches"]]
+        )
+        category = tables["categories"](ev["category"]) if ev["is_elective"] else -1
+        return events(
+            [
+                tables["days"](ev["day"]),
+                tables["times"](ev["start"]),
+                tables["times"](ev["end"]),
+                tables["subjects"]([ev["subject"], ev["subjectcode"]]),
+                tables["teachers"](ev["teacher"]),
+                tables["venues"](ev["venue"]),
+                tables["types"](ev["type"]),
+                batch_set,
+                category,
+            ]
+        )
+
+    phase = {
+        "electives": [encode_event(ev) for ev in electives],
+        "schedules": {
+            batch_id: {
+                day: [encode_event(ev) for ev in day_events]
+                for day, day_events in data["classes"].items()
+            }
+            for batch_id, data in batches.items()
+        },
+        "versions": {
+            batch_id: data["cacheVersion"] for batch_id, data in batches.items()
+        },
+    }
+    phase.update({name: table.values for name, table in tables.items()})
+    phase["events"] = events.values
+
+    return phase
+
+
+def encode_classes_v2(classes: dict) -> dict:
+    phases: Dict[str, dict] = {}
+    batches: Dict[str, Dict[str, dict]] = {key: {} for key in classes["electives"]}
+
+    for class_batch_key, data in classes.items():
+        if class_batch_key == "electives":
+            continue
+        elective_key, batch_id = class_batch_key.rsplit("_", 1)
+        batches.setdefault(elective_key, {})[batch_id] = data
+
+    for elective_key, phase_batches in batches.items():
+        phases[elective_key] = encode_phase(
+            classes["electives"].get(elective_key, []), phase_batches
+        )
+
+    return {"version": 2, "phases": phases}
+
+
+def decode_phase(phase: dict) -> tuple[List[dict], Dict[str, dict]]:
+    batch_sets = [
+        [phase["batches"][b] for b in batch_set] for batch_set in phase["batch_sets"]
+    ]
+
+    def decode_event(event_id: int) -> dict:
+        event = phase["events"][event_id]
+        day, start, end, subject, teacher, venue, type_, batch_set, category = event
+        subject, subjectcode = phase["subjects"][subject]
+        # same key order as generate_cache.serialize_event / get_electives
+        if category < 0:
+            return {
+                "is_elective": False,
+                "start": phase["times"][start],
+                "end": phase["times"][end],
+                "day": phase["days"][day],
+                "subject": subject,
+                "subjectcode": subjectcode,
+                "teacher": phase["teachers"][teacher],
+                "batches": list(batch_sets[batch_set]),
+                "venue": phase["venues"][venue],
+                "type": phase["types"][type_],
+            }
+
+        return {
+            "is_elective": True,
+            "start": phase["times"][start],
+            "end": phase["times"][end],
+            "subject": subject,
+            "subjectcode": subjectcode,
+            "teacher": phase["teachers"][teacher],
+            "day": phase["days"][day],
+            "batches": list(batch_sets[batch_set]),
+            "category": phase["categories"][category],
+            "venue": phase["venues"][venue],
+            "type": phase["types"][type_],
+        }
+
+    electives = [decode_event(event_id) for event_id in phase["electives"]]
+    schedules = {
+        batch_id: {
+            day: [decode_event(event_id) for event_id in event_ids]
+            for day, event_ids in days.items()
+        }
+        for batch_id, days in phase["schedules"].items()
+    }
+    return electives, schedules
+
+
+def decode_classes_v2(data: dict) -> dict:
+    """Reference decoder, expands v2 back into the v1 classes structure"""
+    if data.get("version") != 2:
+        raise ValueError(f"not a v2 classes document: version {data.get('version')}")
+
+    classes: Dict[str, Any] = {"electives": {}}
+    for elective_key, phase in data["phases"].items():
+        electives, schedules = decode_phase(phase)
+        classes["electives"][elective_key] = electives
+        for batch_id, days in schedules.items():
+            classes[f"{elective_key}_{batch_id}"] = {
+                "cacheVersion": phase["versions"][batch_id],
+                "classes": days,
+            }
+
+    return classes
+
+
+def check_roundtrip(classes: dict) -> bool:
+    """True when the v2 encoding of classes decodes back to byte identical v1 json"""
+    decoded = decode_classes_v2(json.loads(json.dumps(encode_classes_v2(classes))))
+    return json.dumps(decoded) == json.dumps(classes)
+
+
+def generate_v2(classes: dict, path: str = V2_FILE) -> None:
+    data = json.dumps(encode_classes_v2(classes), separators=(",", ":"))
+    build_state.write_if_changed(path, data.encode())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="write classes.v2.json from classes.json")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only verify that v2 round-trips to classes.json",
+    )
+    args = parser.parse_args()
+
+    with open("classes.json", "r") as f:
+        classes = json.load(f)
+
+    if args.check:
+        ok = check_roundtrip(classes)
+        if ok:
+            print("v2 round-trip matches classes.json")
+        else:
+            print("v2 round-trip DIFFERS from classes.json")
+        raise SystemExit(0 if ok else 1)
+
+    generate_v2(classes)
+    print(f"{V2_FILE} generated from classes.json")
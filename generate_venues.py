@@ -0,0 +1,188 @@
+"""
+venue occupancy index
+gathers the events of every course/sem/phase (core classes and electives,
+each shared event once) into venues.json:
+
+{
+  "venues": {
+    "{venue}": {
+      "{day}": {
+        "busy": [[start, end], ...],
+        "events": [[start, end, subjectcode, type, teacher, "{course_id}_{sem_id}_{phase_id}"], ...]
+      }
+    }
+  }
+}
+times are minutes after midnight, busy holds the merged, sorted and disjoint
+intervals of the events, so "is the room free" is a bisect per venue.
+"""
+
+import json
+import re
+from bisect import bisect_right
+from typing import Dict, List, Tuple
+
+import build_state
+
+VENUES = "venues.json"
+
+# shared labs are written "CL18/CL19", anything else with a "/" is one venue
+ROOM = re.compile(r"[A-Z]{0,4}-?\d+[A-Z]?")
+
+
+def to_minutes(value: str) -> int:
+    """'09:50 AM' -> 590, also accepts 24h '9:50'"""
+    value = value.strip().upper()
+    meridiem = value[-2:] if value.endswith(("AM", "PM")) else ""
+    hours, minutes = value.removesuffix(meridiem).strip().split(":")
+    hours = int(hours) % 12 if meridiem else int(hours)
+    if meridiem == "PM":
+        hours += 12
+    return hours * 60 + int(minutes)
+
+
+def event_interval(ev: dict) -> Tuple[int, int]:
+    start, end = to_minutes(ev["start"]), to_minutes(ev["end"])
+    # some sheets give e.g. 08:00 AM - 08:50 PM for a single period
+    if end - start > 8 * 60:
+        end -= 12 * 60
+    return start, end
+
+
+def split_venue(venue: str) -> List[str]:
+    parts = [part.strip() for part in venue.split("/")]
+    if len(parts) > 1 and all(ROOM.fullmatch(part) for part in parts):
+        return parts
+    return [venue.strip()]
+
+
+def merge_intervals(intervals: List[Tuple[int, int]]) -> List[List[int]]:
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def build_venue_index(classes: dict) -> dict:
+    events: Dict[tuple, list] = {}
+
+    def add(ev: dict, elective_key: str):
+        start, end = event_interval(ev)
+        for venue in split_venue(ev["venue"]):
+            if not venue:
+                continue
+            event = [start, end, ev["subjectcode"], ev["type"], ev["teacher"], elective_key]
+            events.setdefault((venue, ev["day"].lower(), *event), event)
+
+    for class_batch_key, data in classes.items():
+        if class_batch_key == "electives":
+            continue
+        elective_key = class_batch_key.rsplit("_", 1)[0]
+        for day_events in data["classes"].values():
+            for ev in day_events:
+                if not ev["is_elective"]:
+                    add(ev, elective_key)
+
+    for elective_key, electives in classes["electives"].items():
+        for ev in electives:
+            add(ev, elective_key)
+
+    venues: Dict[str, Dict[str, dict]] = {}
+    for (venue, day, *_), event in sorted(events.items()):
+        occupancy = venues.setdefault(venue, {}).setdefault(
+            day, {"busy": [], "events": []}
+        )
+        occupancy["events"].append(event)
+
+    for days in venues.values():
+        for day in days.values():
+            day["busy"] = merge_intervals([(ev[0], ev[1]) for ev in day["events"]])
+
+    return {"venues": venues}
+
+
+class VenueIndex:
+    """Queries over a venues.json document"""
+
+    def __init__(self, data: dict):
+        self.venues: Dict[str, Dict[str, dict]] = data["venues"]
+        self.starts: Dict[Tuple[str, str], List[int]] = {
+            (venue, day): [start for start, _ in occupancy["busy"]]
+            for venue, days in self.venues.items()
+            for day, occupancy in days.items()
+        }
+
+    @classmethod
+    def load(cls, path: str = VENUES):
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def is_free(self, venue: str, day: str, start: int, end: int) -> bool:
+        day = day.lower()
+        starts = self.starts.get((venue, day))
+        if not starts:
+            return venue in self.venues
+
+        busy = self.venues[venue][day]["busy"]
+        # the last busy interval starting before `end` must be over by `start`
+        i = bisect_right(starts, end - 1) - 1
+        return i < 0 or busy[i][1] <= start
+
+    def free_rooms(self, day: str, start: int, end: int) -> List[str]:
+        return sorted(
+            venue for venue in self.venues if self.is_free(venue, day, start, end)
+        )
+
+    def occupancy(self, venue: str, day: str | None = None) -> Dict[str, List[list]]:
+        days = self.venues.get(venue, {})
+        if day is not None:
+            day = day.lower()
+            return {day: days[day]["events"]} if day in days else {}
+        return {day: occupancy["events"] for day, occupancy in days.items()}
+
+
+def generate_venues(classes: dict, path: str = VENUES) -> dict:
+    index = build_venue_index(classes)
+    build_state.write_if_changed(path, json.dumps(index, separators=(",", ":")).encode())
+    return index
+
+
+def format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02}:{minutes % 60:02}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="venue occupancy index and free rooms")
+    parser.add_argument(
+        "--free",
+        nargs=3,
+        metavar=("DAY", "START", "END"),
+        help="list the rooms free on DAY between START and END (e.g. tuesday 10:00 11:00)",
+    )
+    parser.add_argument("--room", help="print the occupancy of a room")
+    parser.add_argument("--day", help="limit --room to one day")
+    args = parser.parse_args()
+
+    if args.free or args.room:
+        index = VenueIndex.load()
+        if args.free:
+            day, start, end = args.free
+            print("\n".join(index.free_rooms(day, to_minutes(start), to_minutes(end))))
+        if args.room:
+            for day, events in index.occupancy(args.room, args.day).items():
+                print(day)
+                for start, end, subjectcode, type_, teacher, elective_key in events:
+                    print(
+                        f"  {format_minutes(start)}-{format_minutes(end)} "
+                        f"{type_} {subjectcode} {teacher} ({elective_key})"
+                    )
+    else:
+        with open("classes.json", "r") as f:
+            classes = json.load(f)
+        index = generate_venues(classes)
+        print(f"{VENUES} generated with {len(index['venues'])} venues")
@@ -1,74 +1,175 @@
-from operator import attrgetter
+"""
+timetable pdfs -> workbooks for raw/time_tables
+every page is extracted with camelot (lattice) in its own worker process and
+the tables it yields are cached in ./.cache/xlsx keyed on the pdf hash and
+page, so re-running on a partly changed set only extracts the new pages.
+merged cells are rebuilt from the cell borders, the extent of every cell is
+read off run lengths of the right/bottom borders computed once per table.
+
+    python generate_xlsx.py timetable.pdf -o "raw/time_tables/B.Tech (btech-128)/5/1.xlsx"
+    python generate_xlsx.py *.pdf --out-dir converted --jobs 8
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple
 
-import camelot
 from openpyxl import Workbook
 
-# PDF = "https://www.jiit.ac.in/sites/default/files/B.TECH_.%20I%20Sem%20Odd%202025%20Wish%20Town.pdf"
+import build_state
 
-PDF = "./2026_ B. Tech. III Yr(V SEMESTER) TIMETABLE ODD SEMESTER 2026, JIIT-128 - Sheet2 (1).pdf"
+XLSX_CACHE = os.path.join(build_state.CACHE_DIR, "xlsx")
 PAGES = "all"
 
-tables = camelot.read_pdf(
-    PDF,
-    pages=PAGES,
-    flavor="lattice",
-    line_scale=40,
-    copy_text=None,
-)
+# bump whenever extract_page changes what it produces
+XLSX_CACHE_VERSION = 1
+
+# {"text": [[str]], "right": [[bool]], "bottom": [[bool]]}, one per table
+Grid = Dict[str, List[list]]
+
+
+def pdf_pages(path: str) -> List[int]:
+    from camelot.handlers import PDFHandler
+
+    return list(PDFHandler(path, pages=PAGES).pages)
+
+
+def extract_page(path: str, page: int) -> List[Grid]:
+    import camelot
+
+    tables = camelot.read_pdf(
+        path,
+        pages=str(page),
+        flavor="lattice",
+        line_scale=40,
+        copy_text=None,
+    )
+
+    grids = []
+    for table in tables:
+        table.set_border()
+        grids.append(
+            {
+                "text": [[cell.text.strip() for cell in row] for row in table.cells],
+                "right": [[bool(cell.right) for cell in row] for row in table.cells],
+                "bottom": [[bool(cell.bottom) for cell in row] for row in table.cells],
+            }
+        )
+    return grids
+
+
+def page_cache_path(digest: str, page: int) -> str:
+    return os.path.join(XLSX_CACHE, f"v{XLSX_CACHE_VERSION}-{digest}-{page}.json")
+
+
+def extract_pdfs(paths: List[str], jobs: int = 1) -> Dict[str, List[Grid]]:
+    """Tables of every pdf in page order, pages missing from the cache are
+    extracted concurrently"""
+    os.makedirs(XLSX_CACHE, exist_ok=True)
+
+    pages: Dict[str, List[str]] = {}
+    pending: List[Tuple[str, int, str]] = []
+    for path in paths:
+        digest = build_state.file_hash(path)
+        pages[path] = []
+        for page in pdf_pages(path):
+            cache_path = page_cache_path(digest, page)
+            pages[path].append(cache_path)
+            # the same pdf under two names is extracted once
+            queued = any(cache_path == queued for *_, queued in pending)
+            if not queued and not os.path.isfile(cache_path):
+                pending.append((path, page, cache_path))
+
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as pool:
+            futures = [
+                (pool.submit(extract_page, path, page), cache_path)
+                for path, page, cache_path in pending
+            ]
+            extracted = [(future.result(), cache_path) for future, cache_path in futures]
+    else:
+        extracted = [
+            (extract_page(path, page), cache_path) for path, page, cache_path in pending
+        ]
+
+    for grids, cache_path in extracted:
+        # moved into place once complete, an interrupted run must not leave
+        # a truncated page under a name that still matches
+        tmp = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "w+") as f:
+            json.dump(grids, f)
+        os.replace(tmp, cache_path)
+
+    tables: Dict[str, List[Grid]] = {}
+    for path, cache_paths in pages.items():
+        tables[path] = []
+        for cache_path in cache_paths:
+            with open(cache_path, "r") as f:
+                tables[path] += json.load(f)
+
+    cached = sum(map(len, pages.values())) - len(pending)
+    print(f"{len(pending)} pages extracted, {cached} cached")
+    return tables
+
+
+def span_ends(grid: Grid) -> Tuple[List[List[int]], List[List[int]]]:
+    """last column / row every cell reaches before a right / bottom border,
+    filled from the far edge so each is one step from its neighbour"""
+    right, bottom = grid["right"], grid["bottom"]
+    nrows, ncols = len(right), len(right[0]) if right else 0
+
+    col_end = [[0] * ncols for _ in range(nrows)]
+    for r in range(nrows):
+        for c in range(ncols - 1, -1, -1):
+            closed = right[r][c] or c == ncols - 1
+            col_end[r][c] = c if closed else col_end[r][c + 1]
 
-tables = sorted(tables, key=attrgetter("page"))
+    row_end = [[0] * ncols for _ in range(nrows)]
+    for r in range(nrows - 1, -1, -1):
+        for c in range(ncols):
+            closed = bottom[r][c] or r == nrows - 1
+            row_end[r][c] = r if closed else row_end[r + 1][c]
 
-wb = Workbook()
-ws = wb.active
-ws.title = "Timetable"
+    return col_end, row_end
 
-excel_row = 1
 
-for table in tables:
-    table.set_border()
-    nrows, ncols = len(table.rows), len(table.cols)
-    visited = set()
+def table_spans(grid: Grid) -> Iterator[Tuple[int, int, int, int, str]]:
+    """(row, col, row_end, col_end, text) of every merged cell, text being the
+    unique non-empty lines of the cells it covers"""
+    text = grid["text"]
+    col_end, row_end = span_ends(grid)
+    nrows, ncols = len(text), len(text[0]) if text else 0
+    covered = [bytearray(ncols) for _ in range(nrows)]
 
     for r in range(nrows):
         c = 0
         while c < ncols:
-            if (r, c) in visited:
+            if covered[r][c]:
                 c += 1
                 continue
 
-            cell = table.cells[r][c]
+            c_end, r_end = col_end[r][c], row_end[r][c]
+            parts = []
+            for rr in range(r, r_end + 1):
+                covered[rr][c : c_end + 1] = b"\x01" * (c_end - c + 1)
+                parts += [t for t in text[rr][c : c_end + 1] if t]
 
-            # Determine span
-            c_end = c
-            while c_end < ncols - 1 and not table.cells[r][c_end].right:
-                c_end += 1
+            yield r, c, r_end, c_end, "\n".join(dict.fromkeys(parts))
+            c = c_end + 1
 
-            r_end = r
-            while r_end < nrows - 1 and not table.cells[r_end][c].bottom:
-                r_end += 1
 
-            parts = []
-            for rr in range(r, r_end + 1):
-                for cc in range(c, c_end + 1):
-                    t = table.cells[rr][cc].text.strip()
-                    if t:
-                        parts.append(t)
-                    visited.add((rr, cc))
-
-            # Unique lines only
-            seen = set()
-            ordered_unique = []
-            for p in parts:
-                if p not in seen:
-                    seen.add(p)
-                    ordered_unique.append(p)
-
-            txt = "\n".join(ordered_unique).strip()
+def tables_workbook(tables: List[Grid]) -> Workbook:
+    """One sheet with the tables stacked, two empty rows apart"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Timetable"
 
+    excel_row = 1
+    for grid in tables:
+        for r, c, r_end, c_end, txt in table_spans(grid):
             if txt:
                 ws.cell(row=excel_row + r, column=c + 1, value=txt)
-
-            # Merge cells if needed
             if r_end > r or c_end > c:
                 ws.merge_cells(
                     start_row=excel_row + r,
@@ -76,7 +177,50 @@ for table in tables:
                     end_row=excel_row + r_end,
                     end_column=c_end + 1,
                 )
-            c = c_end + 1
-    excel_row += nrows + 2
-
-wb.save("timetable.xlsx")
+        excel_row += len(grid["text"]) + 2
+
+    return wb
+
+
+def generate_xlsx(pdfs: Dict[str, str], jobs: int = 1) -> None:
+    """Convert {pdf path: xlsx path}"""
+    tables = extract_pdfs(list(pdfs), jobs)
+    for pdf, xlsx in pdfs.items():
+        if os.path.dirname(xlsx):
+            os.makedirs(os.path.dirname(xlsx), exist_ok=True)
+        tables_workbook(tables[pdf]).save(xlsx)
+        print(f"{xlsx} written with {len(tables[pdf])} tables")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="timetable pdfs to xlsx workbooks")
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("-o", "--output", help="workbook path, for a single pdf")
+    parser.add_argument(
+        "--out-dir", default=".", help="directory for {pdf name}.xlsx workbooks"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes extracting pages",
+    )
+    args = parser.parse_args()
+
+    if args.output and len(args.pdfs) > 1:
+        parser.error("--output takes a single pdf, use --out-dir")
+
+    if args.output:
+        outputs = {args.pdfs[0]: args.output}
+    else:
+        outputs = {
+            pdf: os.path.join(
+                args.out_dir, os.path.splitext(os.path.basename(pdf))[0] + ".xlsx"
+            )
+            for pdf in args.pdfs
+        }
+
+    generate_xlsx(outputs, args.jobs)
@@ -0,0 +1,312 @@
+"""
+http query server over the generated cache
+metadata.json and classes.json (or classes.v2.json) are loaded once into an
+index keyed by course, sem, phase, batch and day with every response body
+encoded up front, so a request is a dict lookup. files are polled and the
+index is swapped in place when they change.
+
+    GET /v1/metadata
+    GET /v1/{course_id}/{sem_id}/{phase_id}                   batches + electives
+    GET /v1/{course_id}/{sem_id}/{phase_id}/electives
+    GET /v1/{course_id}/{sem_id}/{phase_id}/{batch_id}[?day=monday]
+    GET /v1/{course_id}/{sem_id}/{phase_id}/{batch_id}.ics[?electives=CODE,CODE]
+
+responses carry a strong ETag derived from the cacheVersion (and, for
+calendars, their stamp) and conditional requests with a matching
+If-None-Match get a 304. calendars hold the core classes and only the chosen
+electives, composed from memoized fragments, stamped like the --stable-ical
+calendars with --term-start and with the time of the (re)load otherwise.
+
+    python serve_cache.py --port 8000 --term-start 2026-07-27
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from compose_icalendar import CalendarComposer
+from generate_v2 import V2_FILE, decode_classes_v2
+
+METADATA = "metadata.json"
+CLASSES = "classes.json"
+
+
+def encode(data) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+class CacheIndex:
+    """Encoded response bodies of one cacheVersion, keyed on the request path
+    parts (and the lowercase day for batch schedules)"""
+
+    def __init__(
+        self, metadata: dict, classes: dict, term: datetime.date | None = None
+    ):
+        self.version: str = metadata["cacheVersion"]
+        self.bodies: Dict[Tuple[str, ...], bytes] = {("metadata",): encode(metadata)}
+        self.composer = CalendarComposer.for_term(classes, term)
+
+        phases: Dict[Tuple[str, str, str], List[str]] = {}
+        for course_id, sems in metadata["batches"].items():
+            for sem_id, sem_phases in sems.items():
+                for phase_id, batches in sem_phases.items():
+                    phases[(course_id, sem_id, phase_id)] = [b["id"] for b in batches]
+
+        for (course_id, sem_id, phase_id), batch_ids in phases.items():
+            elective_key = "_".join((course_id, sem_id, phase_id))
+            electives = classes["electives"].get(elective_key, [])
+            self.bodies[(course_id, sem_id, phase_id)] = encode(
+                {"cacheVersion": self.version, "batches": batch_ids, "electives": electives}
+            )
+            self.bodies[(course_id, sem_id, phase_id, "electives")] = encode(
+                {"cacheVersion": self.version, "electives": electives}
+            )
+
+            for batch_id in batch_ids:
+                data = classes.get(f"{elective_key}_{batch_id}")
+                if data is None:
+                    continue
+                key = (course_id, sem_id, phase_id, batch_id)
+                self.bodies[key] = encode(
+                    {"cacheVersion": self.version, "classes": data["classes"]}
+                )
+                for day, events in data["classes"].items():
+                    self.bodies[(*key, day.lower())] = encode(
+                        {"cacheVersion": self.version, "day": day, "classes": events}
+                    )
+
+    @classmethod
+    def load(
+        cls,
+        metadata_path: str = METADATA,
+        classes_path: str = CLASSES,
+        term: datetime.date | None = None,
+    ):
+        with open(metadata_path, "r") as f:
+            metadata = json.load(f)
+
+        if os.path.isfile(classes_path):
+            with open(classes_path, "r") as f:
+                classes = json.load(f)
+        else:
+            with open(V2_FILE, "r") as f:
+                classes = decode_classes_v2(json.load(f))
+
+        return cls(metadata, classes, term)
+
+    def lookup(self, parts: List[str], day: str | None) -> bytes | None:
+        key = tuple(part.lower() for part in parts)
+        if day is not None:
+            key = (*key, day.lower())
+        return self.bodies.get(key)
+
+    def calendar(self, parts: List[str], electives: List[str]) -> bytes | None:
+        """raises ValueError for electives the batch is not offered"""
+        class_batch_key = "_".join(part.lower() for part in parts)
+        if class_batch_key not in self.composer.classes:
+            return None
+        return self.composer.compose(class_batch_key, electives)
+
+
+class CacheStore:
+    """Holds the current CacheIndex and reloads it when the files change"""
+
+    def __init__(
+        self,
+        metadata_path: str = METADATA,
+        classes_path: str = CLASSES,
+        term: datetime.date | None = None,
+    ):
+        self.paths = (metadata_path, classes_path, V2_FILE)
+        self.term = term
+        self.mtimes = self.stat()
+        self.index = CacheIndex.load(metadata_path, classes_path, term)
+
+    def stat(self) -> Tuple[float, ...]:
+        return tuple(
+            os.path.getmtime(path) if os.path.isfile(path) else 0.0
+            for path in self.paths
+        )
+
+    def reload_if_changed(self) -> bool:
+        mtimes = self.stat()
+        if mtimes == self.mtimes:
+            return False
+
+        try:
+            index = CacheIndex.load(*self.paths[:2], self.term)
+        except (OSError, ValueError, KeyError) as e:
+            # a half written file, picked up again on the next poll
+            print(f"reload skipped: {e}")
+            return False
+
+        self.mtimes = mtimes
+        # a single attribute store, requests in flight keep the old index
+        self.index = index
+        print(f"reloaded cacheVersion {index.version}")
+        return True
+
+    def watch(self, interval: float) -> None:
+        def poll():
+            while True:
+                time.sleep(interval)
+                self.reload_if_changed()
+
+        threading.Thread(target=poll, daemon=True).start()
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class CacheHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # buffered writes with TCP_NODELAY, so headers and body leave together
+    # and keep-alive clients do not wait on delayed ACKs
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    store: CacheStore
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if not parts or parts[0] != "v1" or not 2 <= len(parts) <= 5:
+            return self.send_error_json(404, "not found")
+
+        query = parse_qs(url.query)
+        if len(parts) == 5 and parts[4].endswith(".ics"):
+            return self.send_calendar(parts, query)
+
+        day = None
+        if "day" in query:
+            day = query["day"][0]
+            if len(parts) != 5:
+                return self.send_error_json(400, "day only applies to a batch")
+
+        index = self.store.index
+        body = index.lookup(parts[1:], day)
+        if body is None:
+            return self.send_error_json(404, "not found")
+
+        self.send_body(body, f'"{index.version}"', "application/json")
+
+    def send_calendar(self, parts: List[str], query: Dict[str, List[str]]):
+        electives = sorted(
+            {
+                code.strip()
+                for value in query.get("electives", [])
+                for code in value.split(",")
+                if code.strip()
+            }
+        )
+        index = self.store.index
+        try:
+            body = index.calendar([*parts[1:4], parts[4][: -len(".ics")]], electives)
+        except ValueError as e:
+            return self.send_error_json(400, str(e))
+        if body is None:
+            return self.send_error_json(404, "not found")
+
+        # without a term the calendar stamp changes with every (re)load of the
+        # index, even under the same cacheVersion, the basket with the query
+        basket = hashlib.sha256(",".join(electives).encode()).hexdigest()[:16]
+        etag = f'"{index.version}-{index.composer.etag}-{basket}"'
+        self.send_body(body, etag, "text/calendar; charset=utf-8")
+
+    def send_body(self, body: bytes, etag: str, content_type: str):
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def send_error_json(self, status: int, message: str):
+        body = encode({"error": message})
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # per-request logging costs more than the lookup itself
+        pass
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    reload_interval: float = 2.0,
+    metadata_path: str = METADATA,
+    classes_path: str = CLASSES,
+    term: datetime.date | None = None,
+) -> None:
+    store = CacheStore(metadata_path, classes_path, term)
+    if reload_interval > 0:
+        store.watch(reload_interval)
+
+    handler = type("Handler", (CacheHandler,), {"store": store})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"serving cacheVersion {store.index.version} on http://{host}:{port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="serve the generated cache over http")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8000)
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=2.0,
+        help="seconds between checks for changed files, 0 disables reloading",
+    )
+    parser.add_argument("--metadata", default=METADATA)
+    parser.add_argument("--classes", default=CLASSES)
+    parser.add_argument(
+        "--term-start",
+        type=datetime.date.fromisoformat,
+        help="first day of classes (YYYY-MM-DD), .ics responses then match the "
+        "--stable-ical calendars and keep their bytes across restarts",
+    )
+    args = parser.parse_args()
+
+    serve(
+        args.host,
+        args.port,
+        args.reload_interval,
+        args.metadata,
+        args.classes,
+        args.term_start,
+    )
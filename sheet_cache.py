@@ -0,0 +1,248 @@
+"""
+compact cell-grid cache of timetable worksheets
+load_worksheet() is the slowest step of get_events, so the loaded sheet is
+converted once into a sparse grid (values, merged ranges, header row/col)
+stored under ./.cache/sheets/{sha256 of the workbook}.pickle and served back
+through CachedSheet, a read-only stand-in for the openpyxl worksheet.
+cells covered by a merged range (other than its top-left cell) come back as
+openpyxl MergedCells, as they do from a loaded workbook.
+opt-in (generate_cache.py --sheet-cache), generate_cache.py
+--check-sheet-cache compares get_events with and without it on raw/.
+"""
+
+import os
+import pickle
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from jiit_tt_parser.utils import load_worksheet
+from openpyxl.cell.cell import MergedCell
+from openpyxl.utils import get_column_letter, range_boundaries
+
+from build_state import CACHE_DIR, file_hash
+
+SHEETS_DIR = os.path.join(CACHE_DIR, "sheets")
+
+# bump when the snapshot layout changes
+SHEET_CACHE_VERSION = 1
+
+
+class CachedCell:
+    __slots__ = ("row", "column", "value")
+
+    def __init__(self, row: int, column: int, value: Any):
+        self.row = row
+        self.column = column
+        self.value = value
+
+    @property
+    def col_idx(self) -> int:
+        return self.column
+
+    @property
+    def column_letter(self) -> str:
+        return get_column_letter(self.column)
+
+    @property
+    def coordinate(self) -> str:
+        return f"{self.column_letter}{self.row}"
+
+    def __repr__(self):
+        return f"<CachedCell {self.coordinate}>"
+
+
+class CachedRange:
+    __slots__ = ("min_row", "min_col", "max_row", "max_col")
+
+    def __init__(self, min_row: int, min_col: int, max_row: int, max_col: int):
+        self.min_row = min_row
+        self.min_col = min_col
+        self.max_row = max_row
+        self.max_col = max_col
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        return self.min_col, self.min_row, self.max_col, self.max_row
+
+    @property
+    def coord(self) -> str:
+        return (
+            f"{get_column_letter(self.min_col)}{self.min_row}:"
+            f"{get_column_letter(self.max_col)}{self.max_row}"
+        )
+
+    def __contains__(self, coord) -> bool:
+        row, col = coord if isinstance(coord, tuple) else (coord.row, coord.column)
+        return (
+            self.min_row <= row <= self.max_row
+            and self.min_col <= col <= self.max_col
+        )
+
+    def __repr__(self):
+        return f"<CachedRange {self.coord}>"
+
+
+class CachedMergedCells:
+    __slots__ = ("ranges",)
+
+    def __init__(self, ranges: List[CachedRange]):
+        self.ranges = ranges
+
+    def __iter__(self):
+        return iter(self.ranges)
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def __contains__(self, coord) -> bool:
+        return any(coord in r for r in self.ranges)
+
+
+class CachedSheet:
+    """Read-only worksheet backed by a snapshot from snapshot_worksheet"""
+
+    def __init__(self, snapshot: Dict[str, Any]):
+        self.title: str = snapshot["title"]
+        self.max_row: int = snapshot["max_row"]
+        self.max_column: int = snapshot["max_col"]
+        self.min_row = 1
+        self.min_column = 1
+        self._values: Dict[Tuple[int, int], Any] = snapshot["cells"]
+        self.merged_cells = CachedMergedCells(
+            [CachedRange(*bounds) for bounds in snapshot["merged"]]
+        )
+        self._merged = {
+            (row, col)
+            for min_row, min_col, max_row, max_col in snapshot["merged"]
+            for row in range(min_row, max_row + 1)
+            for col in range(min_col, max_col + 1)
+            if (row, col) != (min_row, min_col)
+        }
+
+    def _cell(self, row: int, column: int):
+        if (row, column) in self._merged:
+            return MergedCell(self, row, column)
+        return CachedCell(row, column, self._values.get((row, column)))
+
+    def _value(self, row: int, column: int) -> Any:
+        if (row, column) in self._merged:
+            return None
+        return self._values.get((row, column))
+
+    def cell(self, row: int, column: int, value: Any = None):
+        if value is not None:
+            raise TypeError("CachedSheet is read-only")
+        return self._cell(row, column)
+
+    def __getitem__(self, key):
+        """ws["B3"], ws["A1:C4"], ws["B"], ws["A:C"], ws[3], ws[2:4], same
+        shapes as openpyxl's Worksheet.__getitem__"""
+        if isinstance(key, slice):
+            if not all([key.start, key.stop]):
+                raise IndexError(f"{key} is not a valid coordinate or range")
+            key = f"{key.start}:{key.stop}"
+        if isinstance(key, int):
+            key = str(key)
+        min_col, min_row, max_col, max_row = range_boundaries(key)
+        if not any([min_col, min_row, max_col, max_row]):
+            raise IndexError(f"{key} is not a valid coordinate or range")
+
+        if min_row is None:
+            cols = tuple(self.iter_cols(min_col, max_col))
+            return cols[0] if min_col == max_col else cols
+        if min_col is None:
+            rows = tuple(self.iter_rows(min_row, max_row, 1, self.max_column))
+            return rows[0] if min_row == max_row else rows
+        if ":" not in key:
+            return self._cell(min_row, min_col)
+        return tuple(self.iter_rows(min_row, max_row, min_col, max_col))
+
+    def iter_rows(
+        self,
+        min_row: Optional[int] = None,
+        max_row: Optional[int] = None,
+        min_col: Optional[int] = None,
+        max_col: Optional[int] = None,
+        values_only: bool = False,
+    ) -> Iterator[tuple]:
+        for row in range(min_row or 1, (max_row or self.max_row) + 1):
+            cols = range(min_col or 1, (max_col or self.max_column) + 1)
+            if values_only:
+                yield tuple(self._value(row, col) for col in cols)
+            else:
+                yield tuple(self._cell(row, col) for col in cols)
+
+    def iter_cols(
+        self,
+        min_col: Optional[int] = None,
+        max_col: Optional[int] = None,
+        min_row: Optional[int] = None,
+        max_row: Optional[int] = None,
+        values_only: bool = False,
+    ) -> Iterator[tuple]:
+        for col in range(min_col or 1, (max_col or self.max_column) + 1):
+            rows = range(min_row or 1, (max_row or self.max_row) + 1)
+            if values_only:
+                yield tuple(self._value(row, col) for row in rows)
+            else:
+                yield tuple(self._cell(row, col) for row in rows)
+
+    @property
+    def rows(self):
+        return self.iter_rows()
+
+    @property
+    def columns(self):
+        return self.iter_cols()
+
+    @property
+    def values(self):
+        return self.iter_rows(values_only=True)
+
+
+def snapshot_worksheet(sheet, r: int, c: int) -> Dict[str, Any]:
+    cells = {}
+    for row in sheet.iter_rows():
+        for cell in row:
+            if cell.value is not None:
+                cells[(cell.row, cell.column)] = cell.value
+
+    return {
+        "version": SHEET_CACHE_VERSION,
+        "title": sheet.title,
+        "max_row": sheet.max_row,
+        "max_col": sheet.max_column,
+        "cells": cells,
+        "merged": [
+            (m.min_row, m.min_col, m.max_row, m.max_col)
+            for m in sheet.merged_cells.ranges
+        ],
+        "r": r,
+        "c": c,
+    }
+
+
+def load_cached_worksheet(branch_xl: str):
+    """load_worksheet(branch_xl) through the cell-grid cache,
+    returns (sheet, r, c) or None like load_worksheet"""
+    cache_path = os.path.join(SHEETS_DIR, f"{file_hash(branch_xl)}.pickle")
+    try:
+        with open(cache_path, "rb") as f:
+            snapshot = pickle.load(f)
+        if snapshot["version"] == SHEET_CACHE_VERSION:
+            return CachedSheet(snapshot), snapshot["r"], snapshot["c"]
+    except (FileNotFoundError, pickle.UnpicklingError, EOFError, KeyError):
+        pass
+
+    ws = load_worksheet(branch_xl)
+    if ws is None:
+        return None
+
+    sheet, r, c = ws
+    snapshot = snapshot_worksheet(sheet, r, c)
+    os.makedirs(SHEETS_DIR, exist_ok=True)
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, cache_path)
+
+    return CachedSheet(snapshot), r, c
@@ -0,0 +1,91 @@
+import datetime
+import json
+import random
+import unittest
+from types import SimpleNamespace
+
+try:
+    from generate_cache import (DAYS, Elective, bucket_events, filter_electives,
+                                filter_events)
+except ImportError:
+    raise unittest.SkipTest("jiit_tt_parser is required")
+
+BATCHES = ["F1", "F2", "F10", "E1", "E2"]
+DAY_NAMES = ["monday", "Monday", "TUESDAY", "wednesday", "Friday", "sunday"]
+
+
+def fake_event(rng: random.Random, i: int):
+    start = datetime.time(rng.randint(8, 16), rng.choice((0, 30)))
+    return SimpleNamespace(
+        period=SimpleNamespace(start_time=start, end_time=start.replace(minute=50)),
+        day=rng.choice(DAY_NAMES),
+        event=rng.choice(("Subject", "")),
+        eventcode=f"15B11CI{i:03d}",
+        lecturer=rng.sample(["ABC", "DEF", "GHI"], rng.randint(1, 2)),
+        # duplicates included, batch order as the sheet lists it
+        batches=rng.choices(BATCHES, k=rng.randint(1, 4)),
+        classroom=rng.choice(("G1", "CL18/CL19")),
+        event_type=rng.choice("LTP"),
+    )
+
+
+def fake_elective(rng: random.Random, i: int) -> dict:
+    return {
+        "is_elective": True,
+        "start": "10:00 AM",
+        "end": "10:50 AM",
+        "subject": f"Elective {i}",
+        "subjectcode": f"26B12CS{i:03d}",
+        "teacher": "DEF",
+        "day": rng.choice(DAY_NAMES),
+        "batches": rng.choices(BATCHES, k=rng.randint(1, 4)),
+        "category": "DE-2",
+        "venue": "CL18",
+        "type": "L",
+    }
+
+
+class BucketEventsTest(unittest.TestCase):
+    """bucket_events must give the lists filter_events + filter_electives did"""
+
+    def assert_matches_filters(self, evs, electives):
+        buckets = bucket_events(evs, electives)
+        for batch in BATCHES + ["G1"]:
+            for day in DAYS:
+                expected = filter_events(evs, batch, day) + filter_electives(
+                    electives, batch, day
+                )
+                got = list(buckets.get((batch, day.lower()), ()))
+                self.assertEqual(json.dumps(got), json.dumps(expected), (batch, day))
+
+    def test_random_phases(self):
+        rng = random.Random(4)
+        for _ in range(50):
+            evs = [fake_event(rng, i) for i in range(rng.randint(0, 40))]
+            # the parser leaves None for cells without an event
+            for _ in range(rng.randint(0, 5)):
+                evs.insert(rng.randint(0, len(evs)), None)
+            electives = [fake_elective(rng, i) for i in range(rng.randint(0, 10))]
+            self.assert_matches_filters(evs, electives)
+
+    def test_skips_electives_in_events(self):
+        rng = random.Random(0)
+        parsed = Elective.__new__(Elective)
+        evs = [fake_event(rng, 1), parsed, None, fake_event(rng, 2)]
+        self.assert_matches_filters(evs, [fake_elective(rng, 3)])
+
+    def test_duplicate_batches(self):
+        rng = random.Random(1)
+        ev = fake_event(rng, 1)
+        ev.day, ev.batches = "Monday", ["F1", "F1", "F2", "F1"]
+        elective = fake_elective(rng, 2)
+        elective["day"], elective["batches"] = "MONDAY", ["F2", "F2"]
+
+        self.assert_matches_filters([ev], [elective])
+        buckets = bucket_events([ev], [elective])
+        self.assertEqual(len(buckets[("F1", "monday")]), 1)
+        self.assertEqual(len(buckets[("F2", "monday")]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
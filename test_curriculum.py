@@ -0,0 +1,27 @@
+import unittest
+
+from generate_curriculum import CourseIndex, generate_courses
+
+
+class CourseIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = CourseIndex(generate_courses())
+
+    def test_lookup_matches_expanded(self):
+        expanded = self.index.expanded()
+        for code, name in expanded.items():
+            with self.subTest(code=code):
+                self.assertEqual(self.index.lookup(code), name)
+
+    def test_partial_codes(self):
+        name = self.index.lookup("15B11MA111")
+        self.assertEqual(self.index.lookup("B11MA111"), name)
+        self.assertEqual(self.index.lookup(" 11ma111 "), name)
+
+    def test_unknown_codes(self):
+        for code in ("", "MA111", "99B99XX999", "1MA111"):
+            self.assertIsNone(self.index.lookup(code))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import datetime
+import unittest
+
+try:
+    import icalendar  # noqa: F401
+    import pytz  # noqa: F401
+except ImportError:
+    raise unittest.SkipTest("icalendar and pytz are required")
+
+from generate_icalendar import (check_serializer_parity, fold_line,
+                                serialize_icalendar_for_batch)
+
+STAMP = datetime.datetime(2026, 7, 1, 9, 30)
+
+
+def event(**fields) -> dict:
+    ev = {
+        "is_elective": False,
+        "start": "09:00 AM",
+        "end": "09:50 AM",
+        "day": "monday",
+        "subject": "Data Structures",
+        "subjectcode": "15B11CI311",
+        "teacher": "ABC",
+        "batches": ["F7"],
+        "venue": "G1",
+        "type": "L",
+    }
+    ev.update(fields)
+    return ev
+
+
+BATCH = {
+    "cacheVersion": "v0",
+    "classes": {
+        "Monday": [
+            event(),
+            # commas, semicolons and backslashes are escaped
+            event(start="10:00 AM", end="10:50 AM", venue="CL18/CL19; LAB, 2\\3"),
+        ],
+        "Tuesday": [
+            # lines longer than 75 octets with multi-byte characters
+            event(
+                day="tuesday",
+                start="02:00 PM",
+                end="03:50 PM",
+                subject="Théorie des Langages et Compilation — Advanced Topics " * 2,
+                teacher="ABC, DEF, GHI",
+                batches=[f"F{i}" for i in range(1, 13)],
+                type="P",
+            )
+        ],
+        "Wednesday": [],
+        "Sunday": [event(day="sunday", start="12:00 PM", end="12:50 PM")],
+    },
+}
+
+
+class SerializerParityTest(unittest.TestCase):
+    def test_components_match_icalendar(self):
+        classes = {"btech-128_sem5_phase1_f7": BATCH}
+        self.assertEqual(check_serializer_parity(classes, STAMP), [])
+
+    def test_lines_are_folded(self):
+        data = serialize_icalendar_for_batch(
+            BATCH, "btech-128", "sem5", "phase1", "f7", STAMP
+        )
+        for line in data.split(b"\r\n"):
+            self.assertLessEqual(len(line), 75)
+            line.decode("utf-8")
+
+    def test_fold_keeps_utf8_sequences(self):
+        line = "SUMMARY:" + "é" * 100
+        folded = fold_line(line)
+        self.assertEqual(folded.replace("\r\n ", ""), line)
+        for part in folded.split("\r\n"):
+            self.assertLessEqual(len(part.encode("utf-8")), 75)
+
+
+if __name__ == "__main__":
+    unittest.main()
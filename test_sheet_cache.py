@@ -0,0 +1,56 @@
+import glob
+import os
+import unittest
+
+try:
+    import openpyxl
+    from openpyxl.cell.cell import MergedCell
+
+    import sheet_cache
+except ImportError:
+    raise unittest.SkipTest("openpyxl and jiit_tt_parser are required")
+
+WORKBOOKS = sorted(glob.glob(os.path.join("raw", "time_tables", "*", "*", "*.xlsx")))
+
+
+def describe(cell) -> tuple:
+    kind = "merged" if isinstance(cell, MergedCell) else "cell"
+    return kind, cell.row, cell.column, cell.value
+
+
+def shape(value):
+    if isinstance(value, tuple):
+        return tuple(shape(item) for item in value)
+    return describe(value)
+
+
+@unittest.skipUnless(WORKBOOKS, "no workbooks in raw/time_tables")
+class CachedSheetTest(unittest.TestCase):
+    """CachedSheet must read like the openpyxl sheet it was taken from"""
+
+    def test_matches_openpyxl(self):
+        for path in WORKBOOKS:
+            with self.subTest(path=path):
+                sheet = openpyxl.load_workbook(path).active
+                cached = sheet_cache.CachedSheet(
+                    sheet_cache.snapshot_worksheet(sheet, 1, 1)
+                )
+
+                for row in range(1, sheet.max_row + 1):
+                    for col in range(1, sheet.max_column + 1):
+                        self.assertEqual(
+                            describe(cached.cell(row, col)),
+                            describe(sheet.cell(row, col)),
+                        )
+
+                self.assertEqual(list(cached.values), list(sheet.values))
+                self.assertEqual(
+                    sorted(r.coord for r in cached.merged_cells),
+                    sorted(r.coord for r in sheet.merged_cells.ranges),
+                )
+                for key in ("A1", "B3:D5", "C", "A:B", 3, "2:4", slice(2, 4)):
+                    self.assertEqual(shape(cached[key]), shape(sheet[key]))
+
+
+if __name__ == "__main__":
+    unittest.main()
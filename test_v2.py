@@ -0,0 +1,103 @@
+import json
+import unittest
+
+from generate_v2 import check_roundtrip, decode_classes_v2, encode_classes_v2
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday")
+
+
+def event(subjectcode: str, day: str, start: str, batches, **fields) -> dict:
+    ev = {
+        "is_elective": False,
+        "start": start,
+        "end": "09:50 AM",
+        "day": day,
+        "subject": f"Subject {subjectcode}",
+        "subjectcode": subjectcode,
+        "teacher": "ABC",
+        "batches": batches,
+        "venue": "G1",
+        "type": "L",
+    }
+    ev.update(fields)
+    return ev
+
+
+def elective(subjectcode: str, day: str, start: str, batches) -> dict:
+    # same key order as generate_cache.get_electives
+    return {
+        "is_elective": True,
+        "start": start,
+        "end": "10:50 AM",
+        "subject": f"Elective {subjectcode}",
+        "subjectcode": subjectcode,
+        "teacher": "DEF, GHI",
+        "day": day,
+        "batches": batches,
+        "category": "DE-2",
+        "venue": "CL18/CL19",
+        "type": "L",
+    }
+
+
+def schedule(**days) -> dict:
+    return {day: days.get(day.lower(), []) for day in DAYS}
+
+
+SHARED = event("15B11CI311", "monday", "09:00 AM", ["F7", "F8"])
+ELECTIVES = [
+    elective("26B12CS312", "tuesday", "10:00 AM", ["F7", "F8"]),
+    elective("26B12CS317", "tuesday", "10:00 AM", ["F8"]),
+]
+
+CLASSES = {
+    "electives": {
+        "btech-128_sem5_phase1": ELECTIVES,
+        # a phase with no electives and no batches
+        "btech-62_sem3_phase1": [],
+    },
+    "btech-128_sem5_phase1_f7": {
+        "cacheVersion": "v1",
+        "classes": schedule(
+            monday=[
+                SHARED,
+                event("15B17CI371", "monday", "02:00 PM", ["F7"], type="P"),
+            ],
+            tuesday=[ELECTIVES[0]],
+        ),
+    },
+    "btech-128_sem5_phase1_f8": {
+        "cacheVersion": "v2",
+        "classes": schedule(monday=[SHARED], tuesday=ELECTIVES),
+    },
+    # a batch without any classes
+    "btech-128_sem5_phase1_f9": {"cacheVersion": "v3", "classes": schedule()},
+}
+
+
+class V2RoundTripTest(unittest.TestCase):
+    def test_decodes_to_v1(self):
+        encoded = json.loads(json.dumps(encode_classes_v2(CLASSES)))
+        decoded = decode_classes_v2(encoded)
+        self.assertEqual(decoded, CLASSES)
+        self.assertEqual(json.dumps(decoded), json.dumps(CLASSES))
+        self.assertTrue(check_roundtrip(CLASSES))
+
+    def test_shared_events_are_stored_once(self):
+        phase = encode_classes_v2(CLASSES)["phases"]["btech-128_sem5_phase1"]
+        # shared class, lab and the two electives
+        self.assertEqual(len(phase["events"]), 4)
+        self.assertEqual(phase["schedules"]["f8"]["Tuesday"], phase["electives"])
+
+    def test_empty_phase(self):
+        phase = encode_classes_v2(CLASSES)["phases"]["btech-62_sem3_phase1"]
+        self.assertEqual(phase["events"], [])
+        self.assertEqual(phase["schedules"], {})
+
+    def test_rejects_other_versions(self):
+        with self.assertRaises(ValueError):
+            decode_classes_v2({"version": 1, "phases": {}})
+
+
+if __name__ == "__main__":
+    unittest.main()
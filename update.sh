@@ -1,6 +1,9 @@
 #!/usr/bin/bash
 
-./.venv/bin/python3 ./generate_cache.py
+# first day of classes of the current term, e.g. TERM_START=2026-07-27 ./update.sh
+: "${TERM_START:?set TERM_START to the first day of classes (YYYY-MM-DD)}"
+
+./.venv/bin/python3 ./generate_cache.py --output both --jobs "$(nproc)" --stable-ical --term-start "$TERM_START" --fast-ical --v2 --deltas --venues --faculty --conflicts --compress
 
 git add .
 git commit -m "update cache"